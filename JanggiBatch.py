@@ -0,0 +1,315 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from JanggiGame import BOARD_SIZE, MOVE_TABLES, PIECE_CODES
+
+
+################################ TABLES ######################################
+# The batch keeps its boards square by square, as a (90, N) array with square = row * 9 + column as in JanggiGame, so
+# that the value of a square in every position is one row of the array. The moves from JanggiGame's tables are grouped
+# by the step they take, such as two rows up and one column left, since every square taking the same step lands on a
+# different square. One group then moves all its pieces in every position at once with a few array operations. The
+# groups need NumPy, so they are built the first time a batch needs them.
+
+_COLUMNS, _ROWS = BOARD_SIZE
+_SQUARES = _COLUMNS * _ROWS
+_RAYS = MOVE_TABLES["rays"]
+_PALACE_MOVES = MOVE_TABLES["palace"]
+_HORSE_MOVES = MOVE_TABLES["horse"]
+_ELEPHANT_MOVES = MOVE_TABLES["elephant"]
+_SOLDIER_MOVES = MOVE_TABLES["soldier"]
+_HORSE_ATTACKERS = MOVE_TABLES["horse attackers"]
+_ELEPHANT_ATTACKERS = MOVE_TABLES["elephant attackers"]
+_SOLDIER_ATTACKERS = MOVE_TABLES["soldier attackers"]
+_PIECE_CODES = PIECE_CODES
+_tables = None
+
+
+def _step(from_square, to_square):
+    """
+    Returns the (columns, rows) step from one square to another
+    """
+    return (to_square % _COLUMNS - from_square % _COLUMNS, to_square // _COLUMNS - from_square // _COLUMNS)
+
+
+def _step_groups(moves):
+    """
+    Groups a list of moves, each a tuple starting with the from square and the to square followed by the squares the
+    piece passes through, by the step they take. Each group is a tuple of arrays, one for each entry of the moves
+    """
+    groups = {}
+    for move in moves:
+        groups.setdefault(_step(move[0], move[1]), []).append(move)
+    return [tuple(np.array(column, np.intp) for column in zip(*group)) for group in groups.values()]
+
+
+def _ray_groups():
+    """
+    Groups the squares along the rays of JanggiGame's ray table by direction. Each direction has a list of (from
+    squares, to squares) arrays, one for each distance along the ray in order, so that the rays in that direction are
+    walked from every square at once
+    """
+    directions = {}
+    for from_square, rays in enumerate(_RAYS):
+        for ray in rays:
+            distances = directions.setdefault(_step(from_square, ray[0]), [])
+            for distance, to_square in enumerate(ray):
+                if distance == len(distances):
+                    distances.append([])
+                distances[distance].append((from_square, to_square))
+    return [[tuple(np.array(column, np.intp) for column in zip(*moves)) for moves in distances]
+            for distances in directions.values()]
+
+
+def _padded(rows):
+    """
+    Turns a list with a tuple of entries for every square into a (90, longest tuple) array, or a (90, longest tuple,
+    entry length) array when the entries are tuples themselves. Missing entries are filled with square 90, which is
+    always empty
+    """
+    width = max(len(row) for row in rows)
+    entry = next(row[0] for row in rows if row)
+    fill = (_SQUARES,) * len(entry) if isinstance(entry, tuple) else _SQUARES
+    return np.array([list(row) + [fill] * (width - len(row)) for row in rows], np.intp)
+
+
+def _batch_tables():
+    """
+    Builds the groups of moves for every type of piece from JanggiGame's move tables, the first time they are needed
+    """
+    global _tables
+    if _tables is None:
+        _tables = {"palace": _step_groups([(from_square, to_square) for from_square, moves in enumerate(_PALACE_MOVES)
+                                           for to_square in moves]),
+                   "horse": _step_groups([(from_square,) + move for from_square, moves in enumerate(_HORSE_MOVES)
+                                          for move in moves]),
+                   "elephant": _step_groups([(from_square,) + move for from_square, moves in enumerate(_ELEPHANT_MOVES)
+                                             for move in moves]),
+                   "rays": _ray_groups(),
+
+                   # Looking outward from a square, for in_check
+                   "palace attackers": _padded(_PALACE_MOVES),
+                   "horse attackers": _padded(_HORSE_ATTACKERS),
+                   "elephant attackers": _padded(_ELEPHANT_ATTACKERS),
+                   "square rays": _padded([[ray + (_SQUARES,) * (_ROWS - len(ray)) for ray in rays] for rays in _RAYS])}
+        for player in ("blue", "red"):
+            _tables[player + " soldier"] = _step_groups([(from_square, to_square) for from_square, moves
+                                                         in enumerate(_SOLDIER_MOVES[player]) for to_square in moves])
+            _tables[player + " soldier attackers"] = _padded(_SOLDIER_ATTACKERS[player])
+    return _tables
+
+
+################################ BATCH #######################################
+
+class JanggiBatch:
+    """
+    The class JanggiBatch holds many Janggi positions at once and answers questions about all of them together with
+    NumPy: which squares are occupied, which squares each player attacks and which players are in check. The boards are
+    stored as an (N, 9, 10) int8 array indexed by position, column and row, holding the same piece codes as the
+    JanggiGame board (0 for an empty square, 1 to 7 for the blue pieces and 9 to 15 for the red pieces), together with
+    the player to move in each position. The pieces move by the same tables the *_valid_moves methods use.
+    """
+
+    def __init__(self, boards, red_to_move=None):
+        """
+        Initializes the batch from an (N, 9, 10) array of piece codes and an optional array of N booleans that are
+        True where red is to move. Blue is to move in every position by default. Raises ImportError if NumPy isn't
+        installed
+        """
+        if np is None:
+            raise ImportError("JanggiBatch needs NumPy")
+
+        self._boards = np.asarray(boards, np.int8).reshape(-1, _COLUMNS, _ROWS)
+        if red_to_move is None:
+            red_to_move = np.zeros(len(self._boards), bool)
+        self._red_to_move = np.asarray(red_to_move, bool).reshape(len(self._boards))
+
+        # The rules work on a (90, N) copy of the boards, with the squares numbered row by row as in JanggiGame
+        self._squares = np.ascontiguousarray(self._boards.transpose(2, 1, 0)).reshape(_SQUARES, len(self._boards))
+
+    @classmethod
+    def from_games(cls, games):
+        """
+        Returns a batch holding the current position of each of the games
+        """
+        if np is None:
+            raise ImportError("JanggiBatch needs NumPy")
+
+        games = list(games)
+        boards = np.array([game.get_board_codes() for game in games], np.int8).reshape(-1, _ROWS, _COLUMNS)
+        red_to_move = [game.get_player_turn() == "red" for game in games]
+        return cls(boards.transpose(0, 2, 1), red_to_move)
+
+    def __len__(self):
+        """
+        Returns the number of positions in the batch
+        """
+        return len(self._boards)
+
+    def get_boards(self):
+        """
+        Returns the (N, 9, 10) array of piece codes
+        """
+        return self._boards
+
+    def get_red_to_move(self):
+        """
+        Returns the array of N booleans that are True where red is to move
+        """
+        return self._red_to_move
+
+    ################################ OCCUPANCY ###################################
+
+    def occupied(self, player=None):
+        """
+        Returns an (N, 9, 10) array of booleans that are True on the squares held by the player's pieces, or by any
+        piece if no player is given
+        """
+        return self._to_boards(self._occupied(player))
+
+    def _occupied(self, player=None):
+        """
+        Returns the (90, N) array of the squares held by the player's pieces, or by any piece
+        """
+        if player is None:
+            return self._squares != 0
+        if player == "blue":
+            return (self._squares > 0) & (self._squares < 8)
+        return self._squares > 8
+
+    def _pieces(self, player, piece):
+        """
+        Returns the (90, N) array of the squares holding the player's pieces of a type, such as "CH"
+        """
+        return self._squares == _PIECE_CODES[player][piece]
+
+    ################################ ATTACKS #####################################
+
+    def attacked(self, player):
+        """
+        Returns an (N, 9, 10) array of booleans that are True on the squares the player attacks in each position. A
+        square is attacked if one of the player's pieces could move there if it was held by the other player, the same
+        squares as the attack maps of JanggiGame, so squares held by the player's own pieces can be attacked too
+        """
+        return self._to_boards(self._attacked(player))
+
+    def _attacked(self, player):
+        """
+        Returns the (90, N) array of the squares the player attacks
+        """
+        tables = _batch_tables()
+        occupied = self._occupied()
+        empty = ~occupied
+        cannons = (self._squares == _PIECE_CODES["blue"]["CA"]) | (self._squares == _PIECE_CODES["red"]["CA"])
+        attacks = np.zeros(occupied.shape, bool)
+
+        # The general, the guards and the soldiers attack fixed squares
+        palace_pieces = self._pieces(player, "GN") | self._pieces(player, "GD")
+        for from_squares, to_squares in tables["palace"]:
+            attacks[to_squares] |= palace_pieces[from_squares]
+
+        soldiers = self._pieces(player, "SD")
+        for from_squares, to_squares in tables[player + " soldier"]:
+            attacks[to_squares] |= soldiers[from_squares]
+
+        # Horses and elephants attack a square when the squares they pass through are empty
+        horses = self._pieces(player, "HR")
+        for from_squares, to_squares, first_steps in tables["horse"]:
+            attacks[to_squares] |= horses[from_squares] & empty[first_steps]
+
+        elephants = self._pieces(player, "EL")
+        for from_squares, to_squares, first_steps, second_steps in tables["elephant"]:
+            attacks[to_squares] |= elephants[from_squares] & empty[first_steps] & empty[second_steps]
+
+        # The rays are walked one square at a time in every position. A chariot attacks each square up to and
+        # including the first piece. A cannon finds its screen, which can't be a cannon, and then attacks each square
+        # up to and including the next piece, unless that piece is a cannon
+        for distances in tables["rays"]:
+            chariots = self._pieces(player, "CH")
+            player_cannons = self._pieces(player, "CA")
+            screened = np.zeros(occupied.shape, bool)
+
+            for from_squares, to_squares in distances:
+                square_occupied = occupied[to_squares]
+                square_cannon = cannons[to_squares]
+                moving_chariots = chariots[from_squares]
+                moving_cannons = player_cannons[from_squares]
+                cannon_screened = screened[from_squares]
+
+                attacks[to_squares] |= moving_chariots | (moving_cannons & cannon_screened & ~square_cannon)
+                chariots[from_squares] = moving_chariots & ~square_occupied
+                player_cannons[from_squares] = moving_cannons & ~(square_occupied & cannon_screened) & ~square_cannon
+                screened[from_squares] = cannon_screened | square_occupied
+
+        return attacks
+
+    def in_check(self, player=None):
+        """
+        Returns an array of N booleans that are True where the player's general is attacked by the other player. If no
+        player is given, it is the player to move in each position. It finds the general's square in every position
+        and looks up, in tables indexed by that square, the squares an attacker of each kind would have to stand on:
+        soldiers, the general and guards along the palace lines, horses and elephants with their blocking squares, and
+        the squares along each ray for chariots and cannons. The pieces on those squares are read for all the positions
+        at once and compared with the other player's piece codes. Table entries that run off the board point at square
+        90, an extra empty square, so every position goes through the same array operations
+        """
+        if player is None:
+            return np.where(self._red_to_move, self.in_check("red"), self.in_check("blue"))
+
+        tables = _batch_tables()
+        opponent = "red" if player == "blue" else "blue"
+        codes = _PIECE_CODES[opponent]
+        positions = np.arange(len(self))
+        generals = self._pieces(player, "GN")
+        general_squares = generals.argmax(axis=0)
+
+        # Square 90 is an extra empty square, used to fill the attacker tables
+        squares = np.vstack([self._squares, np.zeros((1, len(self)), np.int8)])
+
+        def pieces_on(table):
+            return squares[table[general_squares], positions]
+
+        check = np.zeros(len(self), bool)
+        for slot in range(tables[opponent + " soldier attackers"].shape[1]):
+            check |= pieces_on(tables[opponent + " soldier attackers"][:, slot]) == codes["SD"]
+
+        for slot in range(tables["palace attackers"].shape[1]):
+            piece = pieces_on(tables["palace attackers"][:, slot])
+            check |= (piece == codes["GN"]) | (piece == codes["GD"])
+
+        horse_attackers = tables["horse attackers"]
+        for slot in range(horse_attackers.shape[1]):
+            check |= ((pieces_on(horse_attackers[:, slot, 0]) == codes["HR"])
+                      & (pieces_on(horse_attackers[:, slot, 1]) == 0))
+
+        elephant_attackers = tables["elephant attackers"]
+        for slot in range(elephant_attackers.shape[1]):
+            check |= ((pieces_on(elephant_attackers[:, slot, 0]) == codes["EL"])
+                      & (pieces_on(elephant_attackers[:, slot, 1]) == 0)
+                      & (pieces_on(elephant_attackers[:, slot, 2]) == 0))
+
+        # A chariot attacks if it is the first piece on a ray, and a cannon if it is the second piece and the first
+        # piece is a screen that isn't a cannon
+        cannons = (_PIECE_CODES["blue"]["CA"], _PIECE_CODES["red"]["CA"])
+        square_rays = tables["square rays"]
+        for slot in range(square_rays.shape[1]):
+            pieces_seen = np.zeros(len(self), np.int8)
+            good_screen = np.zeros(len(self), bool)
+            for distance in range(square_rays.shape[2]):
+                piece = pieces_on(square_rays[:, slot, distance])
+                occupied = piece != 0
+                first_piece = occupied & (pieces_seen == 0)
+                check |= first_piece & (piece == codes["CH"])
+                check |= occupied & (pieces_seen == 1) & good_screen & (piece == codes["CA"])
+                good_screen |= first_piece & (piece != cannons[0]) & (piece != cannons[1])
+                pieces_seen += occupied
+
+        return check & generals.any(axis=0)
+
+    def _to_boards(self, squares):
+        """
+        Turns a (90, N) array, with the squares numbered row by row, into an (N, 9, 10) array indexed by column and row
+        """
+        return squares.reshape(_ROWS, _COLUMNS, -1).transpose(2, 1, 0)
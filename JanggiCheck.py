@@ -0,0 +1,236 @@
+import random
+import sys
+import time
+
+from JanggiEngine import JanggiEngine
+from JanggiGame import JanggiGame, PASS_MOVE, move_names, square_name
+
+
+# Consistency checks that compare the game's faster paths with simpler ways of getting the same answer, on the positions
+# of seeded random games. Each check writes a line with the number of positions checked and the number of mismatches,
+# and returns True if there were none. The perft counts are checked separately by JanggiPerft.
+
+# Number of random games each check plays, and the most moves in each
+GAMES = 100
+MAX_MOVES = 150
+
+# The parallel search check starts a pool of workers for every search, so it only searches one position in this many
+PARALLEL_INTERVAL = 250
+
+
+################################ POSITIONS ###################################
+
+def random_positions(games=GAMES, seed=0, max_moves=MAX_MOVES):
+    """
+    Plays games seeded random games and yields the game at every position reached, from the starting position on. Half
+    of the moves are captures when there is one to make, so the games reach open positions and checks quickly. The game
+    has to be put back as it was before the next position is asked for
+    """
+    for index in range(games):
+        generator = random.Random("%d-%d" % (seed, index))
+        game = JanggiGame()
+        for _ in range(max_moves):
+            yield game
+            moves = list(game.legal_moves())
+            if not moves:
+                break
+            captures = [move for move in moves if move != PASS_MOVE and game.get_piece_at(move % 90) is not None]
+            game.push(generator.choice(captures) if captures and generator.random() < 0.5 else generator.choice(moves))
+
+
+def _report(name, positions, mismatches, start, output):
+    """
+    Writes the result line of a check and returns True if there were no mismatches
+    """
+    output.write("%-14s %8d positions %6d mismatches in %.1f s  %s\n"
+                 % (name, positions, mismatches, time.perf_counter() - start, "ok" if not mismatches else "FAILED"))
+    return mismatches == 0
+
+
+################################ NOTATION ####################################
+
+def check_notation(games=GAMES, seed=0, output=sys.stdout):
+    """
+    Saves every position with to_fen and to_bytes, restores it with from_fen and from_bytes, and makes sure the
+    restored games give back the same text and bytes, the same board codes and position key, and the same legal moves
+    """
+    start = time.perf_counter()
+    positions = mismatches = 0
+    for game in random_positions(games, seed):
+        positions += 1
+        fen = game.to_fen()
+        data = game.to_bytes()
+        legal_moves = sorted(game.legal_moves())
+        for restored in (JanggiGame.from_fen(fen), JanggiGame.from_bytes(data)):
+            if (restored.to_fen() != fen or restored.to_bytes() != data
+                    or restored.get_board_codes() != game.get_board_codes()
+                    or restored.get_position_key() != game.get_position_key()
+                    or sorted(restored.legal_moves()) != legal_moves):
+                mismatches += 1
+                output.write("  %s doesn't round trip\n" % fen)
+                break
+    return _report("notation", positions, mismatches, start, output)
+
+
+################################ MOVES #######################################
+
+def _make_move_moves(game):
+    """
+    Returns the legal moves of the player to move, other than passing, found by trying every move of every one of their
+    pieces with make_move, which goes through the *_valid_moves methods, and taking back each one that is made
+    """
+    player = game.get_player_turn()
+    moves = []
+    for from_square in range(90):
+        piece = game.get_piece_at(from_square)
+        if piece is None or piece[0] != player:
+            continue
+        for to_square in range(90):
+            if to_square != from_square and game.make_move(square_name(from_square), square_name(to_square)):
+                game.pop()
+                moves.append(from_square * 90 + to_square)
+    return moves
+
+
+def check_evasions(games=GAMES, seed=0, output=sys.stdout):
+    """
+    In every position where the player to move is in check, makes sure evasion_moves yields exactly the moves make_move
+    accepts, in the same order, including none at all when the player is checkmated
+    """
+    start = time.perf_counter()
+    positions = mismatches = 0
+    for game in random_positions(games, seed):
+        if game.get_in_check() != game.get_player_turn():
+            continue
+        positions += 1
+        evasions = list(game.evasion_moves())
+        expected = _make_move_moves(game)
+        if evasions != expected:
+            mismatches += 1
+            output.write("  %s: evasion_moves differs from make_move on %s\n"
+                         % (game.to_fen(), " ".join(" ".join(move_names(game, move))
+                                                    for move in sorted(set(evasions) ^ set(expected)))))
+    return _report("evasions", positions, mismatches, start, output)
+
+
+def check_are_legal(games=GAMES, seed=0, output=sys.stdout):
+    """
+    In every position, asks are_legal about the legal moves, random pairs of squares (some of them not on the board),
+    passes and encoded moves, and makes sure each answer is the one make_move gives, taking back each move make_move
+    makes. are_legal mustn't change the game, so the position, its key and its history are compared as well
+    """
+    start = time.perf_counter()
+    generator = random.Random(seed)
+    names = [square_name(square) for square in range(90)] + ["j1", "a11", ""]
+    positions = mismatches = 0
+    for game in random_positions(games, seed):
+        positions += 1
+        legal_moves = list(game.legal_moves())
+        moves = [move_names(game, move) for move in legal_moves]
+        moves += [(generator.choice(names), generator.choice(names)) for _ in range(20)]
+        moves += legal_moves + [generator.randrange(-5, PASS_MOVE + 5) for _ in range(10)] + [PASS_MOVE]
+
+        before = (game.to_bytes(), game.get_position_key(), len(game.get_position_history()))
+        answers = game.are_legal(moves)
+        changed = (game.to_bytes(), game.get_position_key(), len(game.get_position_history())) != before
+
+        expected = []
+        for move in moves:
+            if isinstance(move, int):
+                expected.append(move in legal_moves)
+            elif game.make_move(*move):
+                game.pop()
+                expected.append(True)
+            else:
+                expected.append(False)
+
+        if changed:
+            mismatches += 1
+            output.write("  %s: are_legal changed the game\n" % game.to_fen())
+        elif answers != expected:
+            mismatches += 1
+            wrong = [move for move, answer, right in zip(moves, answers, expected) if answer != right]
+            output.write("  %s: are_legal differs from make_move on %r\n" % (game.to_fen(), wrong[:5]))
+    return _report("are_legal", positions, mismatches, start, output)
+
+
+def _incremental_state_differs(game):
+    """
+    Returns the names of the parts of the game's incremental state that differ from the same state worked out from
+    scratch: the attack maps, which the moves keep up to date a piece at a time, and the position key
+    """
+    attack_sets, attack_counts = game.create_attack_maps()
+    differences = []
+    if game._attack_sets != attack_sets:
+        differences.append("attack sets")
+    if game._attack_counts != attack_counts:
+        differences.append("attack counts")
+    if game.get_position_key() != game.create_position_key():
+        differences.append("position key")
+    return differences
+
+
+def check_incremental_state(games=GAMES, seed=0, output=sys.stdout, moves_per_position=4):
+    """
+    In every position, and after pushing and after popping a few of its legal moves chosen at random, makes sure the
+    attack maps and position key the moves keep up to date are the ones create_attack_maps and create_position_key
+    work out from scratch
+    """
+    start = time.perf_counter()
+    generator = random.Random(seed)
+    positions = mismatches = 0
+    for game in random_positions(games, seed):
+        positions += 1
+        legal_moves = list(game.legal_moves())
+        moves = generator.sample(legal_moves, min(moves_per_position, len(legal_moves)))
+        differences = _incremental_state_differs(game)
+        for move in moves:
+            if differences:
+                break
+            names = " ".join(move_names(game, move))
+            game.push(move)
+            differences = ["%s after pushing %s" % (name, names) for name in _incremental_state_differs(game)]
+            game.pop()
+            if not differences:
+                differences = ["%s after popping %s" % (name, names) for name in _incremental_state_differs(game)]
+        if differences:
+            mismatches += 1
+            output.write("  %s: %s\n" % (game.to_fen(), ", ".join(differences)))
+    return _report("incremental", positions, mismatches, start, output)
+
+
+################################ SEARCH ######################################
+
+def check_parallel_search(games=GAMES, seed=0, output=sys.stdout, depths=(1, 2), workers=2):
+    """
+    Searches one position in every PARALLEL_INTERVAL to each of the depths, with search and with parallel_search, and
+    makes sure both give the same move and score. Deeper than 2 moves the scores can differ a little, because each
+    engine's transposition table can answer a position with a result that was searched deeper, and which results it
+    holds depends on the order the moves were searched in
+    """
+    start = time.perf_counter()
+    positions = mismatches = 0
+    for index, game in enumerate(random_positions(games, seed)):
+        if index % PARALLEL_INTERVAL:
+            continue
+        positions += 1
+        position = game.clone()
+        for depth in depths:
+            single = JanggiEngine(position).search(depth)
+            parallel = JanggiEngine(position).parallel_search(depth, workers)
+            if single != parallel:
+                mismatches += 1
+                output.write("  %s: depth %d search gives %r and parallel_search %r\n"
+                             % (position.to_fen(), depth, single, parallel))
+                break
+    return _report("parallel", positions, mismatches, start, output)
+
+
+CHECKS = [check_notation, check_evasions, check_are_legal, check_incremental_state, check_parallel_search]
+
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else GAMES
+    results = [check(games) for check in CHECKS]
+    if not all(results):
+        sys.exit(1)
@@ -0,0 +1,417 @@
+import multiprocessing
+import os
+import sys
+import time
+
+from JanggiGame import JanggiGame, PASS_MOVE
+
+
+# Material value of each type of piece. The generals can't be captured, so they are worth nothing
+PIECE_VALUES = {"CH": 13, "CA": 7, "HR": 5, "EL": 3, "GD": 3, "SD": 2, "GN": 0}
+
+# Score for checkmating the other player. Mates found closer to the root score higher, so the engine prefers the
+# quickest mate and the slowest loss
+MATE_SCORE = 100000
+
+# Scores this close to MATE_SCORE are mate scores, which count the moves to the mate
+_MATE_THRESHOLD = MATE_SCORE - 1000
+
+# The node and time budget is checked every this many nodes, as well as before each move at the root
+BUDGET_INTERVAL = 64
+
+# Kinds of scores stored in the transposition table
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class SearchStopped(Exception):
+    """
+    Raised inside the search when the node or time budget runs out, to unwind back to the root
+    """
+    pass
+
+
+class JanggiEngine:
+    """
+    The class JanggiEngine searches a JanggiGame position for the best move for the player whose turn it is. It uses
+    negamax alpha-beta search with iterative deepening, so each search to a new depth starts from the best move found
+    at the previous depth, and a fixed size transposition table keyed by the game's position key. The search can be
+    limited by depth, by number of nodes and by time. Moves are made and taken back with the game's push and pop
+    methods, so the game is left as it was when the search ends.
+    """
+
+    def __init__(self, game, table_size=1 << 18):
+        """
+        Initializes the engine for the game. The transposition table has table_size entries, rounded down to a power
+        of two, and each entry holds (position key, depth, score, kind of score, best move, search number)
+        """
+        size = 1
+        while size * 2 <= table_size:
+            size *= 2
+        self._game = game
+        self._table = [None] * size
+        self._table_mask = size - 1
+        self._search_number = 0
+        self._nodes = 0
+        self._node_limit = None
+        self._deadline = None
+        self._info = {}
+
+    def get_table_size(self):
+        """
+        Returns the number of entries in the transposition table
+        """
+        return len(self._table)
+
+    def get_search_info(self):
+        """
+        Returns a dictionary describing the last search: the depth completed, the best move and its score, the number
+        of nodes searched, the time taken in seconds and the number of nodes per second
+        """
+        return dict(self._info)
+
+    def clear_table(self):
+        """
+        Empties the transposition table
+        """
+        self._table = [None] * len(self._table)
+
+    ################################ SEARCH ######################################
+
+    def search(self, max_depth=4, node_limit=None, time_limit=None):
+        """
+        Searches the position to max_depth moves, one depth at a time, and returns the best move (encoded the same way
+        as the game's legal_moves) and its score from the point of view of the player to move. If node_limit nodes have
+        been searched or time_limit seconds have passed, the search stops and returns the result of the deepest search
+        that finished. If it stops before the search to depth 1 finishes, the first move in search order is returned
+        with the position's evaluation. Returns (None, score) if the player to move has no legal moves
+        """
+        self._search_number += 1
+        self._nodes = 0
+        self._node_limit = node_limit
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+        start = time.perf_counter()
+
+        best_move = None
+        best_score = self.evaluate()
+        completed_depth = 0
+
+        for depth in range(1, max_depth + 1):
+            try:
+                move, score = self._search_root(depth)
+            except SearchStopped:
+                break
+            best_move, best_score, completed_depth = move, score, depth
+
+            # There is no point searching deeper once a mate has been found
+            if abs(best_score) >= MATE_SCORE - max_depth:
+                break
+
+        if completed_depth == 0:
+            moves = self._ordered_moves(self._probe_move(self._game.get_position_key()))
+            if moves:
+                best_move = moves[0]
+            else:
+                best_score = self._no_moves_score(0)
+
+        seconds = time.perf_counter() - start
+        self._info = {"depth": completed_depth, "move": best_move, "score": best_score, "nodes": self._nodes,
+                      "seconds": seconds, "nodes_per_second": self._nodes / seconds if seconds else 0.0}
+        return best_move, best_score
+
+    def parallel_search(self, max_depth=4, workers=None):
+        """
+        Searches the position to max_depth moves across a pool of worker processes, by splitting the root moves
+        between them, and returns the best move and its score. Each worker receives a copy of the game once and keeps
+        its own transposition table, then searches the position after each root move it is given to max_depth - 1
+        moves. workers defaults to the number of CPUs. The result is the same kind as from search, and
+        get_search_info also reports the number of workers. Every root move is searched with a full window, without the
+        alpha of the moves searched before it, so the workers together search more nodes than search does to the same
+        depth, where the later root moves are cut off by the best score so far. The speedup against search is therefore
+        smaller than the number of workers, and can be below one
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        start = time.perf_counter()
+
+        moves = self._ordered_moves(self._probe_move(self._game.get_position_key()))
+        best_move = None
+        best_score = self._no_moves_score(0) if not moves else -MATE_SCORE - 1
+        nodes = 0
+
+        if moves:
+            with multiprocessing.Pool(workers, _start_worker, (self._game, len(self._table))) as pool:
+                tasks = [(move, max_depth - 1) for move in moves]
+                for move, score, move_nodes in pool.imap_unordered(_search_move, tasks):
+                    nodes += move_nodes
+                    if score > best_score or (score == best_score and moves.index(move) < moves.index(best_move)):
+                        best_move, best_score = move, score
+
+        seconds = time.perf_counter() - start
+        self._info = {"depth": max_depth, "move": best_move, "score": best_score, "nodes": nodes, "seconds": seconds,
+                      "nodes_per_second": nodes / seconds if seconds else 0.0, "workers": workers}
+        return best_move, best_score
+
+    def _search_root(self, depth):
+        """
+        Searches each legal move from the root to the depth and returns the best move and its score. The best move from
+        the transposition table is searched first
+        """
+        game = self._game
+        moves = self._ordered_moves(self._probe_move(game.get_position_key()))
+        if not moves:
+            return None, self._no_moves_score(0)
+
+        alpha = -MATE_SCORE - 1
+        best_move = moves[0]
+        for move in moves:
+            self._check_budget()
+            game.push(move)
+            try:
+                score = -self._negamax(depth - 1, -MATE_SCORE - 1, -alpha, 1)
+            finally:
+                game.pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+
+        self._store(game.get_position_key(), depth, alpha, EXACT, best_move, 0)
+        return best_move, alpha
+
+    def _negamax(self, depth, alpha, beta, ply):
+        """
+        Returns the score of the position for the player to move, searched depth more moves with alpha-beta pruning.
+        Scores at or below alpha and at or above beta are only bounds
+        """
+        self._nodes += 1
+        if self._nodes % BUDGET_INTERVAL == 0:
+            self._check_budget()
+
+        game = self._game
+        key = game.get_position_key()
+        entry = self._table[key & self._table_mask]
+        table_move = None
+
+        # Uses the transposition table entry if it is for this position and was searched at least as deep
+        if entry is not None and entry[0] == key:
+            table_move = entry[4]
+            if entry[1] >= depth:
+                score, kind = _from_table_score(entry[2], ply), entry[3]
+                if kind == EXACT:
+                    return score
+                if kind == LOWER_BOUND and score >= beta:
+                    return score
+                if kind == UPPER_BOUND and score <= alpha:
+                    return score
+
+        if depth <= 0:
+            return self.evaluate()
+
+        moves = self._ordered_moves(table_move)
+        if not moves:
+            return self._no_moves_score(ply)
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE - 1
+        best_move = None
+        for move in moves:
+            game.push(move)
+            try:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            kind = UPPER_BOUND
+        elif best_score >= beta:
+            kind = LOWER_BOUND
+        else:
+            kind = EXACT
+        self._store(key, depth, best_score, kind, best_move, ply)
+        return best_score
+
+    def _ordered_moves(self, first_move):
+        """
+        Returns the legal moves of the position in the order they should be searched: the move from the transposition
+        table first, then captures of the most valuable pieces, then the other moves, with passing last
+        """
+        game = self._game
+        captures = []
+        quiet_moves = []
+        pass_moves = []
+        first_moves = []
+
+        for move in game.legal_moves():
+            if move == first_move:
+                first_moves.append(move)
+                continue
+            if move == PASS_MOVE:
+                pass_moves.append(move)
+                continue
+            captured_piece = game.get_piece_at(move % 90)
+            if captured_piece is not None:
+                captures.append((PIECE_VALUES[captured_piece[1][:2]], move))
+            else:
+                quiet_moves.append(move)
+
+        captures.sort(reverse=True)
+        return first_moves + [move for _, move in captures] + quiet_moves + pass_moves
+
+    def _no_moves_score(self, ply):
+        """
+        Returns the score for a player with no legal moves. They are checkmated, and a mate closer to the root scores
+        worse for them
+        """
+        return -MATE_SCORE + ply
+
+    def _check_budget(self):
+        """
+        Raises SearchStopped when the node or time budget has run out
+        """
+        if self._node_limit is not None and self._nodes >= self._node_limit:
+            raise SearchStopped()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchStopped()
+
+    ################################ EVALUATION ##################################
+
+    def evaluate(self):
+        """
+        Returns the material balance of the position from the point of view of the player to move
+        """
+        game = self._game
+        blue_score = sum(PIECE_VALUES[key[:2]] for key in game.get_blue_pieces())
+        red_score = sum(PIECE_VALUES[key[:2]] for key in game.get_red_pieces())
+        if game.get_player_turn() == "blue":
+            return blue_score - red_score
+        return red_score - blue_score
+
+    ################################ TRANSPOSITION TABLE #########################
+
+    def _probe_move(self, key):
+        """
+        Returns the best move stored in the transposition table for the position key, or None
+        """
+        entry = self._table[key & self._table_mask]
+        if entry is not None and entry[0] == key:
+            return entry[4]
+        return None
+
+    def _store(self, key, depth, score, kind, move, ply):
+        """
+        Stores a search result, found ply moves from the root, in the transposition table. An entry is replaced if it
+        is from an earlier search, or if the new result was searched at least as deep, so the deepest results of the
+        current search are kept. Mate scores are stored counting from the position rather than from the root, so they
+        are right wherever the position is reached again
+        """
+        index = key & self._table_mask
+        entry = self._table[index]
+        if entry is None or entry[5] != self._search_number or depth >= entry[1]:
+            self._table[index] = (key, depth, _to_table_score(score, ply), kind, move, self._search_number)
+
+
+################################ PARALLEL SEARCH #############################
+# Each worker process of parallel_search holds its own copy of the game and its own engine, set up once by
+# _start_worker, and searches the root moves it is sent with _search_move.
+
+_worker_engine = None
+
+
+def _start_worker(game, table_size):
+    """
+    Sets up the engine of a worker process for its copy of the game
+    """
+    global _worker_engine
+    _worker_engine = JanggiEngine(game, table_size)
+
+
+def _search_move(task):
+    """
+    Searches the position after a root move in a worker process. The task is (move, depth). Returns the move, its score
+    from the point of view of the player making it, and the number of nodes searched
+    """
+    move, depth = task
+    game = _worker_engine._game
+    game.push(move)
+    try:
+        # At the horizon the position is evaluated without looking for mate, the same as a leaf of _negamax
+        if depth <= 0:
+            score, nodes = _worker_engine.evaluate(), 1
+        else:
+            reply, score = _worker_engine.search(depth)
+            nodes = _worker_engine.get_search_info()["nodes"]
+    finally:
+        game.pop()
+    return move, _parent_score(score), nodes
+
+
+def _parent_score(score):
+    """
+    Turns the score of a position into the score of the move leading to it, for the player making the move. Mate
+    scores move one ply further from the root
+    """
+    if score >= _MATE_THRESHOLD:
+        return -score + 1
+    if score <= -_MATE_THRESHOLD:
+        return -score - 1
+    return -score
+
+
+def _to_table_score(score, ply):
+    """
+    Turns a score found ply moves from the root into the score stored in the transposition table. A mate score counts
+    the moves to the mate from the root, and is changed to count them from the position instead
+    """
+    if score >= _MATE_THRESHOLD:
+        return score + ply
+    if score <= -_MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _from_table_score(score, ply):
+    """
+    Reverses _to_table_score for a position reached ply moves from the root
+    """
+    if score >= _MATE_THRESHOLD:
+        return score - ply
+    if score <= -_MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def measure_speedup(game, depth=4, workers=None):
+    """
+    Searches the game to a fixed depth, first in a single process and then with parallel_search, and returns a
+    dictionary with the time taken by each, the number of nodes each searched, the number of workers and the speedup of
+    the parallel search. The two don't do the same work: the single process search shares its alpha between the root
+    moves and the parallel one doesn't, so the parallel search searches more nodes and the speedup is less than it
+    would be for the same search split between processes
+    """
+    single_engine = JanggiEngine(game)
+    single_engine.search(depth)
+    single = single_engine.get_search_info()
+
+    parallel_engine = JanggiEngine(game)
+    parallel_engine.parallel_search(depth, workers)
+    parallel = parallel_engine.get_search_info()
+
+    return {"depth": depth, "workers": parallel["workers"], "single_seconds": single["seconds"],
+            "parallel_seconds": parallel["seconds"], "single_nodes": single["nodes"],
+            "parallel_nodes": parallel["nodes"], "speedup": single["seconds"] / parallel["seconds"]}
+
+
+if __name__ == "__main__":
+    result = measure_speedup(JanggiGame(), int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+                             int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print("depth %(depth)d, %(workers)d workers: single %(single_seconds).2f s (%(single_nodes)d nodes), "
+          "parallel %(parallel_seconds).2f s (%(parallel_nodes)d nodes), speedup %(speedup).2fx" % result)
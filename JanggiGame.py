@@ -1,4 +1,425 @@
-from termcolor import colored
+import random
+import warnings
+
+from JanggiProfile import Profiler
+
+################################ GEOMETRY ####################################
+# Every square of the 9x10 board is numbered row by row (square = row * 9 + column). The tables below are built once,
+# when the module is imported, so that move generation only visits the squares a piece is actually able to reach.
+
+_COLUMNS = 9
+_ROWS = 10
+_PALACE_CENTERS = (13, 76)      # e2 and e9
+
+
+def _square(coordinates):
+    """
+    Returns the square number of a pair of [column, row] coordinates
+    """
+    return coordinates[1] * _COLUMNS + coordinates[0]
+
+
+def _on_board(column, row):
+    """
+    Returns True if the column and row are on the board
+    """
+    return 0 <= column < _COLUMNS and 0 <= row < _ROWS
+
+
+def _in_palace(column, row):
+    """
+    Returns True if the column and row are inside one of the two palaces
+    """
+    return 3 <= column <= 5 and (0 <= row <= 2 or 7 <= row <= 9)
+
+
+def _palace_diagonal(from_square, to_square):
+    """
+    Returns True if the two squares are joined by one of the diagonal lines of a palace. The diagonal lines always
+    run between the center of a palace and one of its corners
+    """
+    from_column, from_row = from_square % _COLUMNS, from_square // _COLUMNS
+    to_column, to_row = to_square % _COLUMNS, to_square // _COLUMNS
+
+    if abs(from_column - to_column) != 1 or abs(from_row - to_row) != 1:
+        return False
+    if not _in_palace(from_column, from_row) or not _in_palace(to_column, to_row):
+        return False
+    return from_square in _PALACE_CENTERS or to_square in _PALACE_CENTERS
+
+
+def _build_rays():
+    """
+    Builds the rays leaving every square, in the order the squares are reached. Each square has up to four straight
+    rays, and the squares on the palace diagonals also have a ray along each diagonal line they are on
+    """
+    rays = []
+    for square in range(_COLUMNS * _ROWS):
+        column, row = square % _COLUMNS, square // _COLUMNS
+        square_rays = []
+
+        # Straight rays stop at the edge of the board
+        for column_step, row_step in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            ray = []
+            next_column, next_row = column + column_step, row + row_step
+            while _on_board(next_column, next_row):
+                ray.append(next_row * _COLUMNS + next_column)
+                next_column, next_row = next_column + column_step, next_row + row_step
+            if ray:
+                square_rays.append(tuple(ray))
+
+        # Diagonal rays follow the palace lines and stop where the line ends
+        for column_step, row_step in ((-1, -1), (1, -1), (-1, 1), (1, 1)):
+            ray = []
+            current = square
+            next_column, next_row = column + column_step, row + row_step
+            while _on_board(next_column, next_row) and _palace_diagonal(current, next_row * _COLUMNS + next_column):
+                current = next_row * _COLUMNS + next_column
+                ray.append(current)
+                next_column, next_row = next_column + column_step, next_row + row_step
+            if ray:
+                square_rays.append(tuple(ray))
+
+        rays.append(tuple(square_rays))
+    return rays
+
+
+def _build_palace_moves():
+    """
+    Builds the squares the general and the guards can step to from every square. They take a single step along the
+    lines of the palace and never leave it, so squares outside the palaces have no moves
+    """
+    palace_moves = []
+    for square in range(_COLUMNS * _ROWS):
+        column, row = square % _COLUMNS, square // _COLUMNS
+        moves = []
+        if _in_palace(column, row):
+            for column_step in (-1, 0, 1):
+                for row_step in (-1, 0, 1):
+                    next_column, next_row = column + column_step, row + row_step
+                    if (column_step, row_step) == (0, 0) or not _in_palace(next_column, next_row):
+                        continue
+                    next_square = next_row * _COLUMNS + next_column
+                    if column_step == 0 or row_step == 0 or _palace_diagonal(square, next_square):
+                        moves.append(next_square)
+        palace_moves.append(tuple(moves))
+    return palace_moves
+
+
+def _build_horse_moves():
+    """
+    Builds the horse's destinations from every square, as (destination, blocking square) pairs. The horse takes one
+    straight step, which is the blocking square, and then one diagonal step away from where it started
+    """
+    horse_moves = []
+    for square in range(_COLUMNS * _ROWS):
+        column, row = square % _COLUMNS, square // _COLUMNS
+        moves = []
+        for column_step, row_step in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            first_step = (column + column_step, row + row_step)
+            for side in (-1, 1):
+                if column_step == 0:
+                    to_column, to_row = column + side, row + 2 * row_step
+                else:
+                    to_column, to_row = column + 2 * column_step, row + side
+                if _on_board(to_column, to_row):
+                    moves.append((to_row * _COLUMNS + to_column, first_step[1] * _COLUMNS + first_step[0]))
+        horse_moves.append(tuple(moves))
+    return horse_moves
+
+
+def _build_elephant_moves():
+    """
+    Builds the elephant's destinations from every square, as (destination, first blocking square, second blocking
+    square) triples. The elephant takes one straight step and then two diagonal steps away from where it started, and
+    both of the squares it passes through have to be empty
+    """
+    elephant_moves = []
+    for square in range(_COLUMNS * _ROWS):
+        column, row = square % _COLUMNS, square // _COLUMNS
+        moves = []
+        for column_step, row_step in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            first_step = (column + column_step, row + row_step)
+            for side in (-1, 1):
+                if column_step == 0:
+                    second_step = (column + side, row + 2 * row_step)
+                    to_column, to_row = column + 2 * side, row + 3 * row_step
+                else:
+                    second_step = (column + 2 * column_step, row + side)
+                    to_column, to_row = column + 3 * column_step, row + 2 * side
+                if _on_board(to_column, to_row):
+                    moves.append((to_row * _COLUMNS + to_column, first_step[1] * _COLUMNS + first_step[0],
+                                  second_step[1] * _COLUMNS + second_step[0]))
+        elephant_moves.append(tuple(moves))
+    return elephant_moves
+
+
+def _build_soldier_moves(forward):
+    """
+    Builds the soldier's destinations from every square for the player moving in the forward direction (-1 for blue,
+    1 for red). Soldiers step forward or sideways, and inside a palace they can also step forward along a diagonal line
+    """
+    soldier_moves = []
+    for square in range(_COLUMNS * _ROWS):
+        column, row = square % _COLUMNS, square // _COLUMNS
+        moves = []
+        for column_step, row_step in ((0, forward), (-1, 0), (1, 0), (-1, forward), (1, forward)):
+            to_column, to_row = column + column_step, row + row_step
+            if not _on_board(to_column, to_row):
+                continue
+            to_square = to_row * _COLUMNS + to_column
+            if column_step == 0 or row_step == 0 or _palace_diagonal(square, to_square):
+                moves.append(to_square)
+        soldier_moves.append(tuple(moves))
+    return soldier_moves
+
+
+# Moves are encoded as a single integer, from_square * 90 + to_square. Passing the turn is encoded as PASS_MOVE
+PASS_MOVE = (_COLUMNS * _ROWS) ** 2
+
+_SQUARE_COORDINATES = [[square % _COLUMNS, square // _COLUMNS] for square in range(_COLUMNS * _ROWS)]
+_RAYS = _build_rays()
+_PALACE_MOVES = _build_palace_moves()
+_HORSE_MOVES = _build_horse_moves()
+_ELEPHANT_MOVES = _build_elephant_moves()
+_SOLDIER_MOVES = {"blue": _build_soldier_moves(-1), "red": _build_soldier_moves(1)}
+
+
+def _build_attackers(moves):
+    """
+    Turns a table of moves into a table of attackers. For every square it lists the moves, from the move table, that
+    end on that square, with the destination replaced by the square the piece moves from
+    """
+    attackers = [[] for _ in range(_COLUMNS * _ROWS)]
+    for from_square, square_moves in enumerate(moves):
+        for move in square_moves:
+            if isinstance(move, tuple):
+                attackers[move[0]].append((from_square,) + move[1:])
+            else:
+                attackers[move].append(from_square)
+    return [tuple(square_attackers) for square_attackers in attackers]
+
+
+_HORSE_ATTACKERS = _build_attackers(_HORSE_MOVES)
+_ELEPHANT_ATTACKERS = _build_attackers(_ELEPHANT_MOVES)
+_SOLDIER_ATTACKERS = {"blue": _build_attackers(_SOLDIER_MOVES["blue"]), "red": _build_attackers(_SOLDIER_MOVES["red"])}
+
+# The name of every square in make_move notation, such as "e9", and the square number of every name. Squares are only
+# turned into names, or names into squares, where they come in or go out of the game
+SQUARE_NAMES = tuple("abcdefghi"[square % _COLUMNS] + str(square // _COLUMNS + 1) for square in range(_COLUMNS * _ROWS))
+_SQUARE_NUMBERS = {name: square for square, name in enumerate(SQUARE_NAMES)}
+
+
+def square_number(name):
+    """
+    Takes the name of a square in make_move notation, such as "e9", and returns its square number. Raises ValueError if
+    the name isn't a square of the board
+    """
+    square = _SQUARE_NUMBERS.get(name)
+    if square is None:
+        raise ValueError("invalid square " + repr(name))
+    return square
+
+
+def square_name(square):
+    """
+    Takes a square number and returns its name in make_move notation
+    """
+    return SQUARE_NAMES[square]
+
+
+def move_names(game, move):
+    """
+    Takes a move of the game's player to move, encoded the same way as legal_moves, and returns its from and to
+    squares in make_move notation. A pass becomes a move from the player's general's square to itself
+    """
+    if move == PASS_MOVE:
+        pieces = game.get_blue_pieces() if game.get_player_turn() == "blue" else game.get_red_pieces()
+        name = SQUARE_NAMES[_square(pieces["GN"])]
+        return name, name
+    return SQUARE_NAMES[move // (_COLUMNS * _ROWS)], SQUARE_NAMES[move % (_COLUMNS * _ROWS)]
+
+
+################################ BITBOARDS ###################################
+# A bitboard is a Python integer with bit number square set for each occupied square. Every ray is stored as a mask
+# together with the direction it runs in, so the first piece along a ray is the lowest set bit of the occupied squares
+# on the ray when it runs towards higher squares, and the highest set bit when it runs towards lower squares.
+
+_PIECE_TYPES = ("CH", "EL", "HR", "GD", "GN", "CA", "SD")
+
+# The board holds a small integer code for the piece on each square: 0 for an empty square, 1 to 7 for the blue pieces
+# in the order of _PIECE_TYPES and 9 to 15 for the red pieces
+_PIECE_CODES = {"blue": {piece: index + 1 for index, piece in enumerate(_PIECE_TYPES)},
+                "red": {piece: index + 9 for index, piece in enumerate(_PIECE_TYPES)}}
+_CODE_PIECES = {code: (player, piece) for player, codes in _PIECE_CODES.items() for piece, code in codes.items()}
+
+# The size of the board, the move tables and the piece codes, for modules that work on many positions at once, such as
+# JanggiBatch. The tables are the ones the game uses, so they mustn't be changed
+BOARD_SIZE = (_COLUMNS, _ROWS)
+MOVE_TABLES = {"rays": _RAYS, "palace": _PALACE_MOVES, "horse": _HORSE_MOVES, "elephant": _ELEPHANT_MOVES,
+               "soldier": _SOLDIER_MOVES, "horse attackers": _HORSE_ATTACKERS,
+               "elephant attackers": _ELEPHANT_ATTACKERS, "soldier attackers": _SOLDIER_ATTACKERS}
+PIECE_CODES = _PIECE_CODES
+
+# The letters for the pieces in position notation, capital letters for blue and small letters for red
+_FEN_LETTERS = {"CH": "R", "EL": "B", "HR": "N", "GD": "A", "GN": "K", "CA": "C", "SD": "P"}
+_CODE_LETTERS = {code: _FEN_LETTERS[piece] if player == "blue" else _FEN_LETTERS[piece].lower()
+                 for code, (player, piece) in _CODE_PIECES.items()}
+_LETTER_CODES = {letter: code for code, letter in _CODE_LETTERS.items()}
+_BITS = [1 << square for square in range(_COLUMNS * _ROWS)]
+_RAY_MASKS = [tuple((sum(_BITS[square] for square in ray), ray[0] > origin) for ray in _RAYS[origin])
+              for origin in range(_COLUMNS * _ROWS)]
+
+
+def _build_check_lines(square):
+    """
+    Builds the bitboard of the squares whose occupancy can change whether a piece attacks the square. These are the
+    squares on the square's rays, where a piece can block a chariot or screen a cannon, and the squares a horse or an
+    elephant has to pass through to reach the square
+    """
+    check_lines = 0
+    for mask, increasing in _RAY_MASKS[square]:
+        check_lines |= mask
+    for from_square, first_step in _HORSE_ATTACKERS[square]:
+        check_lines |= _BITS[first_step]
+    for from_square, first_step, second_step in _ELEPHANT_ATTACKERS[square]:
+        check_lines |= _BITS[first_step] | _BITS[second_step]
+    return check_lines
+
+
+_PALACE_MASKS = [sum(_BITS[to_square] for to_square in moves) for moves in _PALACE_MOVES]
+_SOLDIER_MASKS = {player: [sum(_BITS[to_square] for to_square in moves) for moves in _SOLDIER_MOVES[player]]
+                  for player in ("blue", "red")}
+_CHECK_LINES = [_build_check_lines(square) for square in range(_COLUMNS * _ROWS)]
+
+
+def _build_attack_watchers():
+    """
+    Builds, for every square, the bitboards of the squares where a piece's attacks can change when that square is
+    emptied or filled: the squares on its rays, where a chariot or a cannon would be blocked or screened, the squares of
+    the horses whose blocking square it is and the squares of the elephants whose blocking squares include it. The
+    attacks of the generals, guards and soldiers never depend on the other pieces
+    """
+    horse_watchers = [0] * (_COLUMNS * _ROWS)
+    elephant_watchers = [0] * (_COLUMNS * _ROWS)
+    for from_square in range(_COLUMNS * _ROWS):
+        for to_square, first_step in _HORSE_MOVES[from_square]:
+            horse_watchers[first_step] |= _BITS[from_square]
+        for to_square, first_step, second_step in _ELEPHANT_MOVES[from_square]:
+            elephant_watchers[first_step] |= _BITS[from_square]
+            elephant_watchers[second_step] |= _BITS[from_square]
+
+    watchers = []
+    for square in range(_COLUMNS * _ROWS):
+        ray_squares = 0
+        for mask, increasing in _RAY_MASKS[square]:
+            ray_squares |= mask
+        watchers.append((ray_squares, horse_watchers[square], elephant_watchers[square]))
+    return watchers
+
+
+_ATTACK_WATCHERS = _build_attack_watchers()
+
+
+def _first_blocker(blockers, increasing):
+    """
+    Returns the bit of the first blocker along a ray, given the occupied squares on the ray
+    """
+    if increasing:
+        return blockers & -blockers
+    return 1 << (blockers.bit_length() - 1)
+
+
+def _squares_up_to(mask, bit, increasing):
+    """
+    Returns the squares of the ray mask from its start up to and including the square of bit
+    """
+    if increasing:
+        return mask & ((bit << 1) - 1)
+    return mask & ~(bit - 1)
+
+
+def _chariot_attacks(square, occupied):
+    """
+    Returns the bitboard of the squares a chariot on the square attacks, given the bitboard of occupied squares. The
+    first piece on each ray is included, whoever it belongs to
+    """
+    attacks = 0
+    for mask, increasing in _RAY_MASKS[square]:
+        blockers = occupied & mask
+        if blockers:
+            attacks |= _squares_up_to(mask, _first_blocker(blockers, increasing), increasing)
+        else:
+            attacks |= mask
+    return attacks
+
+
+def _cannon_attacks(square, occupied, cannons):
+    """
+    Returns the bitboard of the squares a cannon on the square attacks, given the bitboards of occupied squares and of
+    the cannons of both players. The cannon needs a screen that isn't a cannon, and the first piece after the screen is
+    included unless it is a cannon
+    """
+    attacks = 0
+    for mask, increasing in _RAY_MASKS[square]:
+        blockers = occupied & mask
+        if not blockers:
+            continue
+
+        screen = _first_blocker(blockers, increasing)
+        if screen & cannons:
+            continue
+
+        beyond = mask & ~_squares_up_to(mask, screen, increasing)
+        blockers = occupied & beyond
+        if blockers:
+            target = _first_blocker(blockers, increasing)
+            beyond = _squares_up_to(beyond, target, increasing)
+            if target & cannons:
+                beyond &= ~target
+        attacks |= beyond
+    return attacks
+
+
+def _bit_squares(bitboard):
+    """
+    Yields the square of each bit set in the bitboard, from the lowest square to the highest
+    """
+    while bitboard:
+        bit = bitboard & -bitboard
+        yield bit.bit_length() - 1
+        bitboard ^= bit
+
+
+################################ ZOBRIST #####################################
+# Each position has a 64-bit Zobrist key, the XOR of a random key for every piece on its square, a key for red to move
+# and a key for the player to move being in check. The keys come from a seeded generator, so a position has the same
+# key in every process and every run.
+
+def _build_zobrist_keys():
+    """
+    Builds the random keys for every player, type of piece and square, followed by the key for red to move and the
+    key for the player to move being in check
+    """
+    generator = random.Random(0x4A616E676769)
+    piece_keys = {}
+    for player in ("blue", "red"):
+        piece_keys[player] = {piece: [generator.getrandbits(64) for _ in range(_COLUMNS * _ROWS)]
+                              for piece in _PIECE_TYPES}
+    return piece_keys, generator.getrandbits(64), generator.getrandbits(64)
+
+
+_ZOBRIST_PIECES, _ZOBRIST_RED_TURN, _ZOBRIST_IN_CHECK = _build_zobrist_keys()
+
+# Number of positions whose answer to "does the player to move have a legal move?" is kept before the cache is cleared
+_LEGAL_MOVE_CACHE_SIZE = 1 << 16
+
+# Methods that are timed on each call while profiling is enabled, on top of the phases of make_move
+_PROFILED_METHODS = ("make_move", "push", "pop", "is_in_check", "checkmate", "enemy_legal_moves",
+                     "general_possible", "chariot_possible", "elephant_possible", "horse_possible", "guard_possible",
+                     "soldier_possible", "cannon_possible", "chariot_valid_moves", "general_valid_moves",
+                     "elephant_valid_moves", "guard_valid_moves", "cannon_valid_moves", "soldier_valid_moves",
+                     "horse_valid_moves")
 
 
 class JanggiGame:
@@ -13,12 +434,12 @@ class JanggiGame:
 
     def __init__(self):
         """
-        Initializes the following private data members, the game board, a list to hold the coordinates of each of the
-        palaces, a list to hold the letters for the columns of the board, initializing the game_state to "UNFINISHED",
-        the player_turn initializing to "BLUE", in_check initializing to "No" and dictionaries to hold the pieces and
-        coordinates for each player.
+        Initializes the following private data members, a list to hold the letters for the columns of the board,
+        initializing the game_state to "UNFINISHED", the player_turn initializing to "BLUE", in_check initializing to
+        None, dictionaries to hold the pieces and coordinates for each player, and the square index, game board,
+        bitboards, undo stack, position key and attack maps that are kept in sync with them, the history of position
+        keys, and a cache of whether the player to move has a legal move in the positions seen so far.
         """
-        self._board = self.create_board()
         self._letters = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i']
         self._game_state = 'UNFINISHED'
         self._player_turn = "blue"
@@ -29,6 +450,52 @@ class JanggiGame:
         self._blue_pieces = {"CH": [0, 9], "CH1": [8, 9], "EL": [1, 9], "EL1": [6, 9], "HR": [2, 9], "HR1": [7, 9],
                              "GD": [3, 9], "GD1": [5, 9], "GN": [4, 8], "CA": [1, 7], "CA1": [7, 7], "SD": [0, 6],
                              "SD1": [2, 6], "SD2": [4, 6], "SD3": [6, 6], "SD4": [8, 6]}
+        self._set_up()
+
+    def _set_up(self):
+        """
+        Sets up the square index, game board, bitboards, undo stack, position key, attack maps and legal move cache
+        from the pieces dictionaries, the player's turn and the check state. The position history starts with the
+        current position, and profiling starts disabled
+        """
+        self._occupants = self.create_occupants()
+        self._board = self.create_board()
+        self._bitboards = self.create_bitboards()
+        self._undo_stack = []
+        self._position_key = self.create_position_key()
+        self._position_history = [self._position_key]
+        self._position_counts = {self._position_key: 1}
+        self._attack_sets, self._attack_counts = self.create_attack_maps()
+        self._legal_move_cache = {}
+        self._profiler = None
+
+    def clone(self):
+        """
+        Returns a new game in the same position, which can be played on without changing this game. Only the flat state
+        is copied: the pieces dictionaries, square index, board, bitboards, attack maps, undo stack and position history
+        are copied one level deep, which is enough since their entries are never changed in place, and the turn, check
+        state, game state and position key are shared values. The cache of legal move answers is keyed by position, so
+        the clone shares it. Profiling is disabled on the clone
+        """
+        game = self.__class__.__new__(self.__class__)
+        game._letters = self._letters
+        game._game_state = self._game_state
+        game._player_turn = self._player_turn
+        game._in_check = self._in_check
+        game._red_pieces = self._red_pieces.copy()
+        game._blue_pieces = self._blue_pieces.copy()
+        game._occupants = self._occupants[:]
+        game._board = self._board[:]
+        game._bitboards = self._bitboards.copy()
+        game._undo_stack = self._undo_stack[:]
+        game._position_key = self._position_key
+        game._position_history = self._position_history[:]
+        game._position_counts = self._position_counts.copy()
+        game._attack_sets = self._attack_sets[:]
+        game._attack_counts = {"blue": self._attack_counts["blue"][:], "red": self._attack_counts["red"][:]}
+        game._legal_move_cache = self._legal_move_cache
+        game._profiler = None
+        return game
 
     def get_blue_pieces(self):
         """
@@ -54,354 +521,663 @@ class JanggiGame:
         """
         return self._player_turn
 
+    def get_piece_at(self, square):
+        """
+        Takes a square number and returns the player and the name of the piece on that square, such as
+        ("blue", "CH1"), or None if the square is empty
+        """
+        return self._occupants[square]
+
+    def get_board_codes(self):
+        """
+        Returns a new list of the piece code on each square, in square order: 0 for an empty square, and otherwise the
+        code from PIECE_CODES, 1 to 7 for the blue pieces and 9 to 15 for the red pieces
+        """
+        return self._board[:]
+
+    def get_position_key(self):
+        """
+        Returns the 64-bit Zobrist key of the current position. It covers the pieces on the board, the player whose
+        turn it is and whether that player is in check, and it is updated with each move rather than recomputed
+        """
+        return self._position_key
+
+    def get_position_count(self, position_key=None):
+        """
+        Returns how many times the position with the key has occurred in the game so far, counting the current position
+        and the position the game started from. The key defaults to the current position's, so a result above 1 means
+        the position is a repetition. Positions are told apart by their position key, which covers the player to move
+        and the check state as well as the pieces, and the count is kept up to date by push and pop, so it is a
+        dictionary lookup
+        """
+        if position_key is None:
+            position_key = self._position_key
+        return self._position_counts.get(position_key, 0)
+
+    def get_position_history(self):
+        """
+        Returns the list of the position keys of the game so far, from the position it started from to the current
+        position, with one entry for each move, passes included
+        """
+        return self._position_history
+
     def get_game_state(self):
         """
-        Returns the game state as "UNFINISHED", "RED_WON", or "BLUE_WON"
+        Returns the game state as "UNFINISHED", "RED_WON", or "BLUE_WON". If the player to move is in check, it makes
+        sure they still have a legal move, so a checkmate reached with push is found as well. The answer is cached by
+        position key, so asking again for the same position costs nothing
         """
+        if self._game_state == "UNFINISHED" and self._in_check == self._player_turn:
+            self.checkmate(self._player_turn)
         return self._game_state
 
     ################################ MOVES #######################################
 
     def make_move(self, from_square, to_square):
         """
-        Takes two string parameters, and determines the from coordinates and the to coordinates. It will check the game
-        state to see if the game has already been won, then it will iterate through the opposing player's dictionary of
-        pieces to verify that the piece they are trying to move is in fact their own piece. It will return false if the
-        square they are trying to move to already has their own piece, since they can't capture their own piece. This
-        will interact with each of the pieces' classes to validate that the coordinates that are entered are valid
-        movements for the type of piece. If any part of the move is invalid, it will return false. Otherwise it will
-        return true and update the coordinates for the players piece, update the gameboard, and update the players_turn
-        """
-        from_input_letter = from_square[0]                          # extracting the letter
-        from_letter_index = self._letters.index(from_input_letter)  # turning the letter into a number based on the letter's list
-        from_number_index = int(from_square[1:]) - 1                # extracting the number and subtracting 1
-        from_coordinates = [from_letter_index, from_number_index]   # turning it into an ordered pair of coordinates
-
-        to_input_letter = to_square[0]
-        to_letter_index = self._letters.index(to_input_letter)
-        to_number_index = int(to_square[1:]) - 1
-        to_coordinates = [to_letter_index, to_number_index]
-
-        # If a player is in check, it will validate that the move helps them move out of check
-        if self._player_turn == self._in_check:
-            if not self.move_out_check(from_coordinates, to_coordinates, self._player_turn):
-                return False
+        Takes two string parameters, and looks up their square numbers in the square table, so a name that isn't a
+        square of the board, such as "j1" or "a11", is an invalid move. It will check the game
+        state to see if the game has already been won, then it will look up the pieces on the from and to squares in
+        the square index to verify that the piece they are trying to move is in fact their own piece. It will return
+        false if the square they are trying to move to already has their own piece, since they can't capture their own
+        piece. This will interact with each of the pieces' classes to validate that the coordinates that are entered are
+        valid movements for the type of piece. If any part of the move is invalid, it will return false. Otherwise it
+        will return true and update the coordinates for the players piece, update the gameboard, and update the
+        players_turn
+        """
+        # Times each phase of the move while profiling is enabled
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.start_laps()
 
-        # If it moves them out of check, the move will be validated and the board/dictionaries will be updated
-            else:
-                if self._player_turn == "blue":
-                    self.validate_moves("blue", from_coordinates, to_coordinates)
-                    self.update_pieces('blue', from_coordinates, to_coordinates)
-                    self.is_in_check("red")
-                    self._player_turn = "red"
-                    return True
-
-                if self._player_turn == "red":
-                    self.validate_moves("red", from_coordinates, to_coordinates)
-                    self.update_pieces('red', from_coordinates, to_coordinates)
-                    self.is_in_check("blue")
-                    self._player_turn = "blue"
-                    return True
+        # Looks up the square numbers in the square table. Names that aren't squares of the board have no number
+        from_number = _SQUARE_NUMBERS.get(from_square)
+        to_number = _SQUARE_NUMBERS.get(to_square)
+        if profiler is not None:
+            profiler.lap("make_move.parse")
 
         # If the game has already been won, then it will return False
         if self._game_state == "RED_WON" or self._game_state == "BLUE_WON":
             return False
 
-        # If the piece that is being moved does not belong to the player who's turn it is, it will return False
-        if self._player_turn == "blue" and from_coordinates in self._red_pieces.values():
+        # If the move is not on the board
+        if from_number is None or to_number is None:
             return False
 
-        if self._player_turn == "red" and from_coordinates in self._blue_pieces.values():
-            return False
+        player = self._player_turn
+        opponent = "red" if player == "blue" else "blue"
+        from_piece = self._occupants[from_number]
+        to_piece = self._occupants[to_number]
 
-        # If the move is not on the board
-        if not self.on_board(to_coordinates[0], to_coordinates[1]):
+        # If the piece that is being moved does not belong to the player who's turn it is, it will return False
+        if from_piece is not None and from_piece[0] == opponent:
             return False
 
-        # If a player decides to pass their turn
-        if from_coordinates == to_coordinates:
-            if self._player_turn == "blue":
-                self._player_turn = "red"
-                return True
-            if self._player_turn == "red":
-                self._player_turn = "blue"
-                return True
+        # If a player decides to pass their turn. They can't pass while they are in check
+        if from_number == to_number:
+            if player == self._in_check:
+                return False
+            self.push(PASS_MOVE)
+            return True
+
+        # If the from square is empty
+        if from_piece is None:
+            return False
 
         # If the to coordinate already has one of the player's pieces
-        if self._player_turn == "blue" and self._board[to_coordinates[0]][to_coordinates[1]] != ' | ':
-            for key, value in self._blue_pieces.items():
-                if value == to_coordinates:
-                    return False
+        if to_piece is not None and to_piece[0] == player:
+            return False
 
-        if self._player_turn == "red" and self._board[to_coordinates[0]][to_coordinates[1]] != ' | ':
-            for key, value in self._red_pieces.items():
-                if value == to_coordinates:
-                    return False
+        # If the to square holds the other player's General. They are only able to put the general in check, not capture
+        if to_piece is not None and to_piece[1] == "GN":
+            return False
+        if profiler is not None:
+            profiler.lap("make_move.ownership")
 
-        # If the from square is empty
-        if self._player_turn == "blue":
-            if from_coordinates not in self._blue_pieces.values():
+        # Communicates with the piece's methods to see if the move is valid per the piece's movement rule
+        from_coordinates = _SQUARE_COORDINATES[from_number]
+        to_coordinates = _SQUARE_COORDINATES[to_number]
+        piece = from_piece[1][:2]
+        if piece == "CH":
+            if not self.chariot_valid_moves(from_coordinates, to_coordinates):
                 return False
 
-        if self._player_turn == "red":
-            if from_coordinates not in self._red_pieces.values():
+        if piece == "EL":
+            if not self.elephant_valid_moves(from_coordinates, to_coordinates):
                 return False
 
-        # If the to square holds the other player's General. They are only able to put the general in check, not capture
-        if self._player_turn == "blue":
-            for key, value in self._red_pieces.items():
-                if key == "GN" and value == to_coordinates:
-                    return False
-
-        if self._player_turn == "red":
-            for key, value in self._blue_pieces.items():
-                if key == "GN" and value == to_coordinates:
-                    return False
+        if piece == "HR":
+            if not self.horse_valid_moves(from_coordinates, to_coordinates):
+                return False
 
-        # Communicates with the piece's methods to see if the move is valid per the piece's movement rule
-        if self._player_turn == "blue":
-            for key, value in list(self._blue_pieces.items()):
-                if value == from_coordinates:
-                    piece = key
-                    if piece == "CH" or piece == "CH1":
-                        if not self.chariot_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "EL" or piece == "EL1":
-                        if not self.elephant_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "HR" or piece == "HR1":
-                        if not self.horse_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "GD" or piece == "GD1":
-                        if not self.guard_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == 'GN':
-                        if not self.general_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "CA" or piece == "CA1":
-                        if not self.cannon_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "SD" or piece == "SD1" or piece == "SD2" or piece == "SD3" or piece == "SD4":
-                        if not self.soldier_valid_moves(from_coordinates, to_coordinates, "blue"):
-                            return False
-                    else:
-                        continue
+        if piece == "GD":
+            if not self.guard_valid_moves(from_coordinates, to_coordinates):
+                return False
 
-        if self._player_turn == "red":
-            for key, value in list(self._red_pieces.items()):
-                if value == from_coordinates:
-                    piece = key
-                    if piece == "CH" or piece == "CH1":
-                        if not self.chariot_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "EL" or piece == "EL1":
-                        if not self.elephant_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "HR" or piece == "HR1":
-                        if not self.horse_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "GD" or piece == "GD1":
-                        if not self.guard_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == 'GN':
-                        if not self.general_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "CA" or piece == "CA1":
-                        if not self.cannon_valid_moves(from_coordinates, to_coordinates):
-                            return False
-
-                    if piece == "SD" or piece == "SD1" or piece == "SD2" or piece == "SD3" or piece == "SD4":
-                        if not self.soldier_valid_moves(from_coordinates, to_coordinates, "red"):
-                            return False
-                    else:
-                        continue
+        if piece == "GN":
+            if not self.general_valid_moves(from_coordinates, to_coordinates):
+                return False
 
-        # Calls the validate_moves function to make the necessary updates to the board, pieces dictionary, and captured pieces
-        # Makes sure the player's move won't put them into check
-        if self._player_turn == "blue":
-            self.validate_moves("blue", from_coordinates, to_coordinates)
-            self.update_pieces('blue', from_coordinates, to_coordinates)
-            if self.is_in_check("blue"):
-                self.validate_moves("blue", to_coordinates, from_coordinates)
-                self.update_pieces('blue', to_coordinates, from_coordinates)
+        if piece == "CA":
+            if not self.cannon_valid_moves(from_coordinates, to_coordinates):
                 return False
-            self.is_in_check("red")
-            self._player_turn = "red"
-            return True
 
-        if self._player_turn == "red":
-            self.validate_moves("red", from_coordinates, to_coordinates)
-            self.update_pieces('red', from_coordinates, to_coordinates)
-            if self.is_in_check("red"):
-                self.validate_moves("red", to_coordinates, from_coordinates)
-                self.update_pieces('red', from_coordinates, to_coordinates)
+        if piece == "SD":
+            if not self.soldier_valid_moves(from_coordinates, to_coordinates, player):
                 return False
-            self.is_in_check("blue")
-            self._player_turn = "blue"
+        if profiler is not None:
+            profiler.lap("make_move.valid_moves")
+
+        # Pushes the move, which makes the necessary updates to the board, pieces dictionary, and captured pieces
+        # Makes sure the player's move won't put them into check, or leave them in check, and takes it back if it does
+        self.push(from_number * _COLUMNS * _ROWS + to_number)
+        self_check = self._general_attacked(player)
+        if self_check:
+            self.pop()
+        if profiler is not None:
+            profiler.lap("make_move.self_check")
+        if self_check:
+            return False
+
+        # Checks to see if the move put the other player in check or checkmate
+        if self._in_check == opponent:
+            self.is_in_check(opponent)
+        if profiler is not None:
+            profiler.lap("make_move.opponent_check")
+        return True
+
+    def push(self, move):
+        """
+        Makes a move without validating it. The move is encoded as from_square * 90 + to_square, or PASS_MOVE to pass
+        the turn. It records the captured piece, the check state, the player's turn and the game state in an undo
+        record, so that pop can take the move back. After the move, the other player's turn begins and in_check is
+        updated to show whether they are in check, and the new position is added to the position history. It doesn't
+        look for checkmate
+        """
+        player = self._player_turn
+        opponent = "red" if player == "blue" else "blue"
+        captured_piece = None
+
+        if move != PASS_MOVE:
+            from_square, to_square = divmod(move, _COLUMNS * _ROWS)
+            captured_piece = self._move_piece(from_square, to_square)
+
+        self._undo_stack.append((move, captured_piece, self._in_check, player, self._game_state))
+        self._player_turn = opponent
+        self._position_key ^= _ZOBRIST_RED_TURN
+        self._set_in_check(opponent if self._general_attacked(opponent) else None)
+
+        # Adds the new position to the history
+        position_key = self._position_key
+        self._position_history.append(position_key)
+        self._position_counts[position_key] = self._position_counts.get(position_key, 0) + 1
+
+    def pop(self):
+        """
+        Takes back the last move made by push or make_move, using its undo record to put back the captured piece, the
+        check state, the player's turn and the game state, and taking the position off the position history. Returns
+        the move that was taken back
+        """
+        move, captured_piece, in_check, player, game_state = self._undo_stack.pop()
+
+        # Takes the position being left out of the history
+        position_key = self._position_history.pop()
+        count = self._position_counts[position_key] - 1
+        if count:
+            self._position_counts[position_key] = count
+        else:
+            del self._position_counts[position_key]
+
+        if move != PASS_MOVE:
+            from_square, to_square = divmod(move, _COLUMNS * _ROWS)
+            self._restore_piece(from_square, to_square, captured_piece)
+
+        self._set_in_check(in_check)
+        self._player_turn = player
+        self._position_key ^= _ZOBRIST_RED_TURN
+        self._game_state = game_state
+        return move
+
+    def _set_in_check(self, player):
+        """
+        Sets the player who is in check, or None, keeping the position key up to date
+        """
+        if (self._in_check is None) != (player is None):
+            self._position_key ^= _ZOBRIST_IN_CHECK
+        self._in_check = player
+
+    def legal_moves(self):
+        """
+        Yields every legal move for the player whose turn it is, encoded as from_square * 90 + to_square, followed by
+        PASS_MOVE when the player is allowed to pass. The moves come from the same rules the piece validators use, and
+        moves that would leave the player's general in check are left out. Nothing is yielded once the game is won.
+        The game can be changed between moves as long as it is put back, for example with push and pop, before the
+        next move is asked for. A player in check gets their moves from evasion_moves
+        """
+        if self._game_state != "UNFINISHED":
+            return
+
+        player = self._player_turn
+        in_check = self._in_check == player
+        if in_check:
+            yield from self.evasion_moves()
+            return
+
+        general_square = _square(self._pieces_of(player)["GN"])
+        opponent_general = self._bitboards["GN"] & ~self._bitboards[player]
+        check_lines = _CHECK_LINES[general_square]
+
+        for from_square in _bit_squares(self._bitboards[player]):
+            piece = self._occupants[from_square][1][:2]
+            targets = self._piece_targets(from_square, piece, player) & ~opponent_general
+            from_move = from_square * _COLUMNS * _ROWS
+
+            # Only a move of the general or a move on or off one of the general's lines can leave the general attacked.
+            # Those moves are pushed to test them, every other move is legal
+            if piece == "GN" or check_lines & _BITS[from_square]:
+                tested = targets
+            else:
+                tested = targets & check_lines
+                for to_square in _bit_squares(targets & ~check_lines):
+                    yield from_move + to_square
+
+            for to_square in _bit_squares(tested):
+                self.push(from_move + to_square)
+                leaves_check = self._general_attacked(player)
+                self.pop()
+                if not leaves_check:
+                    yield from_move + to_square
+
+        # A player who isn't in check can always pass
+        yield PASS_MOVE
+
+    def evasion_moves(self):
+        """
+        Yields the legal moves of the player whose turn it is when they are in check, in the same order and encoding as
+        legal_moves, and without PASS_MOVE since a player in check can't pass. Rather than testing every move, it works
+        out from the pieces giving check which moves could answer them: the general's own moves, capturing a checking
+        piece, moving onto the squares between a chariot or a cannon and the general, onto a horse's or an elephant's
+        blocking squares, or moving a cannon's screen away. Only those moves are pushed to make sure the general is no
+        longer attacked, which also leaves out the moves that uncover another check. If the player isn't in check, it
+        yields the same moves as legal_moves
+        """
+        player = self._player_turn
+        if self._in_check != player:
+            yield from self.legal_moves()
+            return
+        if self._game_state != "UNFINISHED":
+            return
+
+        general_square = _square(self._pieces_of(player)["GN"])
+        opponent_general = self._bitboards["GN"] & ~self._bitboards[player]
+        checks = self._check_evasion_masks(player, general_square)
+
+        for from_square in _bit_squares(self._bitboards[player]):
+            piece = self._occupants[from_square][1][:2]
+            targets = self._piece_targets(from_square, piece, player) & ~opponent_general
+
+            # A move other than the general's has to answer every check, either with the square it moves to or, for
+            # a cannon's screen, with the square it leaves
+            if piece != "GN":
+                for to_squares, from_squares in checks:
+                    if not from_squares & _BITS[from_square]:
+                        targets &= to_squares
+
+            from_move = from_square * _COLUMNS * _ROWS
+            for to_square in _bit_squares(targets):
+                self.push(from_move + to_square)
+                leaves_check = self._general_attacked(player)
+                self.pop()
+                if not leaves_check:
+                    yield from_move + to_square
+
+    def _check_evasion_masks(self, player, general_square):
+        """
+        Finds the other player's pieces that attack the player's general and returns a (to squares, from squares) pair
+        of bitboards for each of them. A move answers the check only if it moves to one of the to squares, which are
+        the checking piece's square and the squares it has to pass over or through to reach the general, or moves away
+        from one of the from squares, which is the screen of a checking cannon
+        """
+        opponent = "red" if player == "blue" else "blue"
+        general_bit = _BITS[general_square]
+        occupied = self._bitboards["blue"] | self._bitboards["red"]
+        checks = []
+
+        for square in _bit_squares(self._bitboards[opponent]):
+            if not self._attack_sets[square] & general_bit:
+                continue
+            piece = self._occupants[square][1][:2]
+            to_squares = _BITS[square]
+            from_squares = 0
+
+            if piece == "CH" or piece == "CA":
+                # The squares between the piece and the general, on the general's ray that reaches the piece
+                for mask, increasing in _RAY_MASKS[general_square]:
+                    if mask & _BITS[square]:
+                        between = _squares_up_to(mask, _BITS[square], increasing) & ~_BITS[square]
+                        to_squares |= between
+                        if piece == "CA":
+                            from_squares = between & occupied
+                        break
+
+            elif piece == "HR":
+                for from_square, first_step in _HORSE_ATTACKERS[general_square]:
+                    if from_square == square:
+                        to_squares |= _BITS[first_step]
+
+            elif piece == "EL":
+                for from_square, first_step, second_step in _ELEPHANT_ATTACKERS[general_square]:
+                    if from_square == square:
+                        to_squares |= _BITS[first_step] | _BITS[second_step]
+
+            checks.append((to_squares, from_squares))
+        return checks
+
+    def has_legal_move(self):
+        """
+        Returns True if the player whose turn it is has at least one legal move. A player who isn't in check can always
+        pass, so there is no stalemate in Janggi and only a player in check can run out of moves. Otherwise it stops at
+        the first legal move legal_moves finds. The answer is cached by position key, since the key covers the pieces,
+        the player to move and the check state
+        """
+        if self._in_check != self._player_turn:
             return True
 
-    def validate_moves(self, player, from_coordinates, to_coordinates):
+        cache = self._legal_move_cache
+        has_move = cache.get(self._position_key)
+        if has_move is None:
+            has_move = next(self.legal_moves(), None) is not None
+            if len(cache) >= _LEGAL_MOVE_CACHE_SIZE:
+                cache.clear()
+            cache[self._position_key] = has_move
+        return has_move
+
+    def clear_legal_move_cache(self):
         """
-        This method is called on by the make_move method. It is set to take a player, from coordinates and to coordinates.
-        It will update the board with the piece's movement and will return back to the make_move function
+        Empties the cache of has_legal_move answers, so the next answer for each position is worked out again. Games
+        made with clone share the cache, so it is emptied for them as well
         """
-        if player == "blue":
-            self._board[to_coordinates[0]][to_coordinates[1]] = self._board[from_coordinates[0]][from_coordinates[1]]
-            self._board[from_coordinates[0]][from_coordinates[1]] = ' | '
+        self._legal_move_cache.clear()
 
-        if player == "red":
-            self._board[to_coordinates[0]][to_coordinates[1]] = self._board[from_coordinates[0]][from_coordinates[1]]
-            self._board[from_coordinates[0]][from_coordinates[1]] = ' | '
+    def are_legal(self, moves):
+        """
+        Takes a list of moves for the player whose turn it is and returns a list of booleans, True for each move that is
+        legal in the current position. A move is either a (from_square, to_square) pair in make_move notation, with a
+        move from a square to itself being a pass, or a move encoded the same way as legal_moves. Each move gets the
+        same answer make_move would give, but the game isn't changed: the work that doesn't depend on the move, such as
+        the general's lines and the pieces giving check, is done once for the whole list, the squares each piece can
+        move to are worked out once per piece, and only the moves that could leave the general attacked are pushed and
+        popped to test them
+        """
+        if self._game_state != "UNFINISHED":
+            return [False] * len(moves)
+
+        player = self._player_turn
+        in_check = self._in_check == player
+        general_square = _square(self._pieces_of(player)["GN"])
+        opponent_general = self._bitboards["GN"] & ~self._bitboards[player]
+        check_lines = _CHECK_LINES[general_square]
+        checks = self._check_evasion_masks(player, general_square) if in_check else ()
+        piece_targets = {}
+        answers = {}
+        legal = []
+
+        for move in moves:
+            if move != PASS_MOVE and not isinstance(move, int):
+                # Looks up the squares the same way as make_move. A pass can't be made from a square of the other
+                # player's pieces
+                from_number = _SQUARE_NUMBERS.get(move[0])
+                to_number = _SQUARE_NUMBERS.get(move[1])
+                if from_number is None or to_number is None:
+                    legal.append(False)
+                    continue
+                from_piece = self._occupants[from_number]
+                if from_piece is not None and from_piece[0] != player:
+                    legal.append(False)
+                    continue
+                move = PASS_MOVE if from_number == to_number else from_number * _COLUMNS * _ROWS + to_number
+
+            if move == PASS_MOVE:
+                legal.append(not in_check)
+                continue
+
+            answer = answers.get(move)
+            if answer is None:
+                answer = False
+                from_square, to_square = divmod(move, _COLUMNS * _ROWS)
+                from_piece = self._occupants[from_square] if 0 <= move < PASS_MOVE else None
+
+                if from_piece is not None and from_piece[0] == player:
+                    # The squares the piece can move to, worked out once for each piece and, when in check, kept to the
+                    # moves that could answer every check
+                    targets = piece_targets.get(from_square)
+                    if targets is None:
+                        piece = from_piece[1][:2]
+                        targets = self._piece_targets(from_square, piece, player) & ~opponent_general
+                        if piece != "GN":
+                            for to_squares, from_squares in checks:
+                                if not from_squares & _BITS[from_square]:
+                                    targets &= to_squares
+                        piece_targets[from_square] = targets
+
+                    if targets & _BITS[to_square]:
+                        # Only a move of the general, a move while in check or a move on or off one of the general's
+                        # lines can leave the general attacked, the same as legal_moves
+                        if (in_check or from_piece[1][:2] == "GN" or check_lines & _BITS[from_square]
+                                or check_lines & _BITS[to_square]):
+                            self.push(move)
+                            answer = not self._general_attacked(player)
+                            self.pop()
+                        else:
+                            answer = True
+                answers[move] = answer
+            legal.append(answer)
 
-        return
+        return legal
+
+    def perft(self, depth):
+        """
+        Counts the leaf nodes of the tree of legal moves, passes included, that is depth moves deep from the current
+        position. The moves are pushed and popped, so the game is left as it was. Used to check move generation
+        against known counts and to measure its speed
+        """
+        if depth <= 0:
+            return 1
+
+        if depth == 1:
+            return sum(1 for _ in self.legal_moves())
+
+        nodes = 0
+        for move in self.legal_moves():
+            self.push(move)
+            nodes += self.perft(depth - 1)
+            self.pop()
+        return nodes
+
+    def divide(self, depth):
+        """
+        Returns a dictionary with each legal move from the current position and the perft count of the position after
+        that move, for depth - 1 more moves. The counts add up to perft(depth). Used to find which move a perft
+        difference comes from
+        """
+        counts = {}
+        for move in list(self.legal_moves()):
+            self.push(move)
+            counts[move] = self.perft(depth - 1)
+            self.pop()
+        return counts
+
+    def validate_moves(self, player, from_coordinates, to_coordinates):
+        """
+        Deprecated, warns and does nothing: update_pieces moves the piece on the board as well as everywhere else
+        """
+        warnings.warn("validate_moves is deprecated and does nothing, update_pieces makes the whole move",
+                      DeprecationWarning, stacklevel=2)
 
     def update_pieces(self, player, from_coordinates, to_coordinates):
         """
-        This method is called on by the make_move function. It takes a player, from coordinates, and to coordinates.
-        It will look through the player's piece dictionary and will update the piece value for the piece that moved. If
-        the movement caused the piece to capture a piece from the opposing player, it will remove that piece from the
-        opposing player's piece dictionary
+        It takes a player, from coordinates, and to coordinates. It will look up the piece that moved in the square
+        index and update its value in the player's piece dictionary. If the movement caused the piece to capture a
+        piece from the opposing player, it will remove that piece from the opposing player's piece dictionary. The
+        board, square index and bitboards are updated to match, the same as when push makes a move. It returns the
+        captured piece, or None
         """
-        # Updates the dictionary for the coordinate of the piece moving
-        if player == 'blue':
-            for key, value in list(self._blue_pieces.items()):
-                if value == from_coordinates:
-                    if key == "CH":
-                        self._blue_pieces.update(CH=to_coordinates)
-                    elif key == "CH1":
-                        self._blue_pieces.update(CH1=to_coordinates)
-                    elif key == "EL":
-                        self._blue_pieces.update(EL=to_coordinates)
-                    elif key == "EL1":
-                        self._blue_pieces.update(EL1=to_coordinates)
-                    elif key == "HR":
-                        self._blue_pieces.update(HR=to_coordinates)
-                    elif key == "HR1":
-                        self._blue_pieces.update(HR1=to_coordinates)
-                    elif key == "GD":
-                        self._blue_pieces.update(GD=to_coordinates)
-                    elif key == "GD1":
-                        self._blue_pieces.update(GD1=to_coordinates)
-                    elif key == "GN":
-                        self._blue_pieces.update(GN=to_coordinates)
-                    elif key == "CA":
-                        self._blue_pieces.update(CA=to_coordinates)
-                    elif key == "CA1":
-                        self._blue_pieces.update(CA1=to_coordinates)
-                    elif key == "SD":
-                        self._blue_pieces.update(SD=to_coordinates)
-                    elif key == "SD1":
-                        self._blue_pieces.update(SD1=to_coordinates)
-                    elif key == "SD2":
-                        self._blue_pieces.update(SD2=to_coordinates)
-                    elif key == "SD3":
-                        self._blue_pieces.update(SD3=to_coordinates)
-                    elif key == "SD4":
-                        self._blue_pieces.update(SD4=to_coordinates)
-
-                # Removes the piece that has been captured, if one has been captured
-            self._red_pieces = {key: value for key, value in self._red_pieces.items() if value != to_coordinates}
-
-        if player == 'red':
-            for key, value in list(self._red_pieces.items()):
-                if value == from_coordinates:
-                    if key == "CH":
-                        self._red_pieces.update(CH=to_coordinates)
-                    elif key == "CH1":
-                        self._red_pieces.update(CH1=to_coordinates)
-                    elif key == "EL":
-                        self._red_pieces.update(EL=to_coordinates)
-                    elif key == "EL1":
-                        self._red_pieces.update(EL1=to_coordinates)
-                    elif key == "HR":
-                        self._red_pieces.update(HR=to_coordinates)
-                    elif key == "HR1":
-                        self._red_pieces.update(HR1=to_coordinates)
-                    elif key == "GD":
-                        self._red_pieces.update(GD=to_coordinates)
-                    elif key == "GD1":
-                        self._red_pieces.update(GD1=to_coordinates)
-                    elif key == "GN":
-                        self._red_pieces.update(GN=to_coordinates)
-                    elif key == "CA":
-                        self._red_pieces.update(CA=to_coordinates)
-                    elif key == "CA1":
-                        self._red_pieces.update(CA1=to_coordinates)
-                    elif key == "SD":
-                        self._red_pieces.update(SD=to_coordinates)
-                    elif key == "SD1":
-                        self._red_pieces.update(SD1=to_coordinates)
-                    elif key == "SD2":
-                        self._red_pieces.update(SD2=to_coordinates)
-                    elif key == "SD3":
-                        self._red_pieces.update(SD3=to_coordinates)
-                    elif key == "SD4":
-                        self._red_pieces.update(SD4=to_coordinates)
-
-                # Removes the piece that has been captured, if one has been captured
-            self._blue_pieces = {key: value for key, value in self._blue_pieces.items() if value != to_coordinates}
+        return self._move_piece(_square(from_coordinates), _square(to_coordinates))
 
+    def _move_piece(self, from_square, to_square):
+        """
+        Moves the piece on the from square to the to square in the pieces dictionaries, the square index, the board
+        and the bitboards. A piece on the to square is captured and removed. Returns the captured piece, or None
+        """
+        moving_piece = self._occupants[from_square]
+        captured_piece = self._occupants[to_square]
+        bitboards = self._bitboards
+        move_bits = _BITS[from_square] | _BITS[to_square]
+        affected = self._remove_attacks(from_square, to_square)
+
+        # Removes the piece that has been captured, if one has been captured
+        if captured_piece is not None:
+            captured_type = captured_piece[1][:2]
+            del self._pieces_of(captured_piece[0])[captured_piece[1]]
+            bitboards[captured_piece[0]] ^= _BITS[to_square]
+            bitboards[captured_type] ^= _BITS[to_square]
+            self._position_key ^= _ZOBRIST_PIECES[captured_piece[0]][captured_type][to_square]
+
+        # Updates the dictionary for the coordinate of the piece moving
+        moving_type = moving_piece[1][:2]
+        keys = _ZOBRIST_PIECES[moving_piece[0]][moving_type]
+        self._pieces_of(moving_piece[0])[moving_piece[1]] = list(_SQUARE_COORDINATES[to_square])
+        self._occupants[to_square] = moving_piece
+        self._occupants[from_square] = None
+        self._board[to_square] = self._board[from_square]
+        self._board[from_square] = 0
+        bitboards[moving_piece[0]] ^= move_bits
+        bitboards[moving_type] ^= move_bits
+        self._position_key ^= keys[from_square] ^ keys[to_square]
+
+        self._add_attacks(affected)
+        return captured_piece
+
+    def _restore_piece(self, from_square, to_square, captured_piece):
+        """
+        Reverses _move_piece. Moves the piece on the to square back to the from square and puts the captured piece,
+        if there was one, back on the to square
+        """
+        moving_piece = self._occupants[to_square]
+        bitboards = self._bitboards
+        move_bits = _BITS[from_square] | _BITS[to_square]
+        affected = self._remove_attacks(from_square, to_square)
+
+        moving_type = moving_piece[1][:2]
+        keys = _ZOBRIST_PIECES[moving_piece[0]][moving_type]
+        self._pieces_of(moving_piece[0])[moving_piece[1]] = list(_SQUARE_COORDINATES[from_square])
+        self._occupants[from_square] = moving_piece
+        self._occupants[to_square] = captured_piece
+        self._board[from_square] = self._board[to_square]
+        self._board[to_square] = 0
+        bitboards[moving_piece[0]] ^= move_bits
+        bitboards[moving_type] ^= move_bits
+        self._position_key ^= keys[from_square] ^ keys[to_square]
+
+        if captured_piece is not None:
+            captured_type = captured_piece[1][:2]
+            self._pieces_of(captured_piece[0])[captured_piece[1]] = list(_SQUARE_COORDINATES[to_square])
+            self._board[to_square] = _PIECE_CODES[captured_piece[0]][captured_type]
+            bitboards[captured_piece[0]] ^= _BITS[to_square]
+            bitboards[captured_type] ^= _BITS[to_square]
+            self._position_key ^= _ZOBRIST_PIECES[captured_piece[0]][captured_type][to_square]
+
+        self._add_attacks(affected)
         return
 
+    def _remove_attacks(self, from_square, to_square):
+        """
+        Called before a piece moves from the from square to the to square, or is moved back. The pieces whose attacks
+        can change are the pieces on the two squares, the chariots and cannons on a ray through either square and the
+        horses and elephants that pass through either square. The attacks of the pieces on the two squares are taken
+        off the attack maps, since they are moving or being captured, and the bitboard of the squares of all these
+        pieces is returned so that _add_attacks can bring them up to date once the move is made
+        """
+        bitboards = self._bitboards
+        sliders = bitboards["CH"] | bitboards["CA"]
+        affected = _BITS[from_square] | _BITS[to_square]
+        for square in (from_square, to_square):
+            ray_squares, horse_squares, elephant_squares = _ATTACK_WATCHERS[square]
+            affected |= ray_squares & sliders | horse_squares & bitboards["HR"] | elephant_squares & bitboards["EL"]
+
+        attack_sets = self._attack_sets
+        for square in (from_square, to_square):
+            if attack_sets[square]:
+                counts = self._attack_counts[self._occupants[square][0]]
+                for attacked_square in _bit_squares(attack_sets[square]):
+                    counts[attacked_square] -= 1
+                attack_sets[square] = 0
+        return affected
+
+    def _add_attacks(self, affected):
+        """
+        Called after a move with the bitboard returned by _remove_attacks. The attacks of the pieces on those squares
+        are worked out for the new position, and only the squares a piece has started or stopped attacking are
+        counted on the attack maps, so a chariot whose line the move didn't reach costs nothing. The square the piece
+        moved from is empty now and is skipped, and the piece that moved, or the piece put back, is found on its new
+        square
+        """
+        attack_sets = self._attack_sets
+        for square in _bit_squares(affected & (self._bitboards["blue"] | self._bitboards["red"])):
+            player, key = self._occupants[square]
+            attacks = self._piece_attacks(square, key[:2], player)
+            old_attacks = attack_sets[square]
+            if attacks == old_attacks:
+                continue
+
+            attack_sets[square] = attacks
+            counts = self._attack_counts[player]
+            for attacked_square in _bit_squares(old_attacks & ~attacks):
+                counts[attacked_square] -= 1
+            for attacked_square in _bit_squares(attacks & ~old_attacks):
+                counts[attacked_square] += 1
+
     ################################ CHECK ########################################
     def is_in_check(self, player):
         """
         Takes either the red or blue player as a parameter and returns True if the player
         is in check. Otherwise, returns False.
         A general is in check if it could be captured during the opposing player's next move
-        This method will check for checkmate and will interact with the enemy_legal_moves method as well as
-        the general_legal_moves method. This is to see if the general has any valid moves. If the general has valid
-        moves, it will call the checkmate function to see if any of the valid moves are moves that the other player could make.
-        If it turns out that the general has valid moves, it will return that the player is in check
+        This method reads the opposing player's attack map to see whether they attack the general's square. If the
+        general is in check, it will call the checkmate function to see if the player has any legal move left.
         """
-        general_coordinates = []
-        general_legal_moves = []
-        enemy_legal_moves = []
-
-        # Searches for the general's coordinates then calls the enemy_legal_moves method
-        if player == "blue":
-            for key, value in self._blue_pieces.items():
-                if key == "GN":
-                    general_coordinates = value
-                    self.enemy_legal_moves("red", enemy_legal_moves)
-
-        if player == "red":
-            for key, value in self._red_pieces.items():
-                if key == "GN":
-                    general_coordinates = value
-                    self.enemy_legal_moves("blue", enemy_legal_moves)
+        # Looks up the general's coordinates then checks whether the other player attacks them
+        if not self._general_attacked(player):
+            return False        # The player is not in check
 
-        # Checks to find out what the general's legal moves are
-        self.general_possible(general_coordinates, player, general_legal_moves)
+        self._set_in_check(player)
+        self.checkmate(player)
+        return True
 
-        # Checks to see if the player is in checkmate
-        self.checkmate(general_legal_moves, general_coordinates, enemy_legal_moves, player)
+    def is_square_attacked(self, coordinates, by_player):
+        """
+        Takes the coordinates of a square and a player and returns True if one of the player's pieces could move to
+        that square on their next move, ignoring whether the move would leave their own general in check. Rather than
+        generating the player's moves, it reads the player's attack map, which counts the player's pieces attacking
+        each square and is kept up to date as moves are made and taken back
+        """
+        return self._attack_counts[by_player][_square(coordinates)] > 0
 
-        # If the general's coordinates are in the list of enemy moves, then the player is in check
-        if general_coordinates in enemy_legal_moves:
-            self._in_check = player
-            return True
-        else:
-            return False        # The player is not in check
+    def _general_attacked(self, player):
+        """
+        Returns True if the player's general is attacked by the other player's pieces
+        """
+        opponent = "red" if player == "blue" else "blue"
+        return self._attack_counts[opponent][_square(self._pieces_of(player)["GN"])] > 0
 
     def enemy_legal_moves(self, player, enemy_legal_moves):
         """
-        The method is called by the is_in_check method. It takes the player and the empty enemy_legal_moves list.
-        It will search through the player's piece dictionary for each piece. It will initiate the coordinates list as
-        the value the current piece has in the dictionary. It will then call the possible move method for each piece to
-        see what their possible moves are. It will repeat until it has gathered all possible moves for all pieces on the
-        player's team. Then it will return the enemy_legal_moves list to the is_in_check method
+        It takes the player and the empty enemy_legal_moves list. It will search through the player's piece dictionary
+        for each piece. It will initiate the coordinates list as the value the current piece has in the dictionary. It
+        will then call the possible move method for each piece to see what their possible moves are. It will repeat
+        until it has gathered all possible moves for all pieces on the player's team, and return the enemy_legal_moves
+        list. The game doesn't call it itself, since is_in_check reads the attack maps instead, but it is kept for
+        callers that want the list of squares, such as the micro benchmarks
         """
         coordinates = []
 
@@ -461,380 +1237,172 @@ class JanggiGame:
 
     def move_out_check(self, from_coordinates, to_coordinates, player):
         """
-        Forces player that is currently in check to move a piece to take their general out of check. Will temporarily
-        move the piece to the to coordinates to then run the enemy_legal_moves method to see if the move successfully
-        takes the general out of check. This method is called by the make_move method. If the move does not take the
-        player out of check, it will return False
+        Checks whether a move takes the player's general out of check. It will push the move, ask _general_attacked
+        whether the general is still attacked, which reads the other player's attack map at the general's square, and
+        then pop the move to put the board back. Passing, or moving from an
+        empty square, leaves the general where it is. If the move does not take the player out of check, it will
+        return False
         """
-        enemy_legal_moves = []
-        general_legal_moves = []
-
-        # Checks the general's coordinates and the list of enemy legal moves. If the general is moving, it will temporarily
-        # move the general on the board to see if it is a valid move
-        if player == "blue":
-            for key, value in self._blue_pieces.items():
-                if key == "GN":
-                    general_coordinates = value
-                    if general_coordinates == from_coordinates:
-                        general_coordinates = to_coordinates
-
-                    self._board[to_coordinates[0]][to_coordinates[1]] = self._board[from_coordinates[0]][from_coordinates[1]]
-                    self._board[from_coordinates[0]][from_coordinates[1]] = ' | '
-                    self.enemy_legal_moves("red", enemy_legal_moves)
-
-        if player == "red":
-            for key, value in self._red_pieces.items():
-                if key == "GN":
-                    general_coordinates = value
-                    if general_coordinates == from_coordinates:
-                        general_coordinates = to_coordinates
-                    self._board[to_coordinates[0]][to_coordinates[1]] = self._board[from_coordinates[0]][from_coordinates[1]]
-                    self._board[from_coordinates[0]][from_coordinates[1]] = ' | '
-                    self.enemy_legal_moves("blue", enemy_legal_moves)
-
-        # Calls the general legal moves method to see if the move is valid
-        self.general_possible(general_coordinates, player, general_legal_moves)
-
-        # if the player is still in check, it will move the general back (if applicable) and will return False
-        if general_coordinates in enemy_legal_moves:
-            if general_coordinates == to_coordinates:
-                self._board[from_coordinates[0]][from_coordinates[1]] = self._board[to_coordinates[0]][to_coordinates[1]]
-                self._board[to_coordinates[0]][to_coordinates[1]] = ' | '
+        from_square = _square(from_coordinates)
+        to_square = _square(to_coordinates)
+
+        if from_square == to_square or self._occupants[from_square] is None:
+            return not self._general_attacked(player)
+
+        # Temporarily plays the move as the player, then takes it back
+        player_turn = self._player_turn
+        self._player_turn = player
+        self.push(from_square * _COLUMNS * _ROWS + to_square)
+        still_in_check = self._general_attacked(player)
+        self.pop()
+        self._player_turn = player_turn
+
+        # if the player is still in check, it will return False
+        if still_in_check:
             return False
-
-        # It will check change the in check to None and will check to see if the general was the one that moved. If it was
-        # then it will update the board and return True
         else:
-            self._in_check = None
-            self._board[from_coordinates[0]][from_coordinates[1]] = self._board[to_coordinates[0]][to_coordinates[1]]
-            self._board[to_coordinates[0]][to_coordinates[1]] = ' | '
             return True
 
-    def checkmate(self, general_legal_moves, general_current, enemy_legal_moves, player):
+    def checkmate(self, player):
         """
-        This is called on in the is_in_check method. It takes the list of the general's legal moves, the general's current
-        move, the list of enemy legal moves and the player. It will append the checkmate list with all of the coordinates
-        in the general legal moves list and in the enemy legal moves list. If the checkmate list and legal moves list
-        are exactly the same, then a checkmate happens and the game is over. It will update the game state and return
+        This is called on in the is_in_check and get_game_state methods. It takes the player who is in check. If it is
+        the player's turn and they have no legal move, whether moving the general, capturing the attacking piece or
+        blocking it, then a checkmate happens and the game is over. It will update the game state and return True if
+        the player has been checkmated
         """
-        checkmate = []
-
-        general_legal_moves.append(general_current)
-
-        for item in general_legal_moves:
-            if item in enemy_legal_moves:
-                checkmate.append(item)
+        if player != self._player_turn or self.has_legal_move():
+            return False
 
-        if checkmate == general_legal_moves:
-            if player == "blue":
-                self._game_state = "RED_WON"
-            if player == "red":
-                self._game_state = "BLUE_WON"
-            else:
-                return
+        if player == "blue":
+            self._game_state = "RED_WON"
+        else:
+            self._game_state = "BLUE_WON"
+        return True
 
     ################################ CHECK MOVES ##################################
 
     def general_possible(self, general_coordinates, player, general_legal_moves):
         """
-        This is called on from the is_in_check method. It takes the general's coordinates, the player and the empty
-        list of the general's legal moves. The method checks a range of values to see what valid moves that the general
-        currently has. It returns the list of general_legal_moves
+        It takes the general's coordinates, the player and the empty list of the general's legal moves. The general can
+        only step along the lines of the palace, so the method reads the squares it can reach from the palace table and
+        keeps the ones not held by the player's own pieces. Each of them is tested by moving the general there with push
+        and taking it back with pop, and only the squares where the general isn't attacked are appended, so these are
+        the general's legal moves. It returns the list of general_legal_moves
         """
+        general_square = _square(general_coordinates)
+        from_move = general_square * _COLUMNS * _ROWS
 
-        for column in range(-1, 2):
-            for row in range(-1, 2):
-                new_column = general_coordinates[0] + column
-                new_row = general_coordinates[1] + row
-                valid_move = [new_column, new_row]              # The valid move that is being tested
-
-                # Starts by indicating the move is valid, this will change to False if it finds a point where it is not valid
-                valid = True
-
-                if not self.on_board(valid_move[0], valid_move[1]):
-                    valid = False
-
-                if not self.within_palace(valid_move[0], valid_move[1]):
-                    valid = False
-
-                if valid_move == general_coordinates:
-                    valid = False
-
-                if valid:
-                    if self._board[valid_move[0]][valid_move[1]] != ' | ':
-                        if player == "blue":
-                            for key, value in self._blue_pieces.items():
-                                if value == valid_move:
-                                    valid = False
-
-                        if player == "red":
-                            for key, value in self._red_pieces.items():
-                                if value == valid_move:
-                                    valid = False
-
-                # If the move is valid, it will append the general_legal_moves list, else it will loop back to the top
-                if valid:
-                    general_legal_moves.append(valid_move)
+        for square in _bit_squares(self._piece_targets(general_square, "GN", player)):
+            self.push(from_move + square)
+            attacked = self._general_attacked(player)
+            self.pop()
+            if not attacked:
+                general_legal_moves.append(list(_SQUARE_COORDINATES[square]))
 
         return general_legal_moves
 
     def chariot_possible(self, coordinates, enemy_legal_moves, player):
         """
-        This is called on from the is_in_check method. It takes the chariot's coordinates, the player and the
-        list of the enemy's legal moves. The method checks a range of values to see what valid moves that the chariot
-        currently has. It returns the appended list of enemy_legal_moves
+        This is called on from the enemy_legal_moves method. It takes the chariot's coordinates, the player and the list
+        of the enemy's legal moves. The squares the chariot attacks along its rays (including the palace diagonals) are
+        looked up from the bitboards, leaving out the player's own pieces. It returns the appended list of
+        enemy_legal_moves
         """
-        for column in range(-9, 9):
-            for row in range(-9, 9):
-                new_column = coordinates[0] + column
-                new_row = coordinates[1] + row
-                valid_move = [new_column, new_row]
-
-                # Starts by indicating the move is valid, this will change to False if it finds a point where it is not valid
-                valid = True
-
-                if not self.on_board(valid_move[0], valid_move[1]):
-                    valid = False
-
-                if valid_move == coordinates:
-                    valid = False
-
-                if valid:
-                    if player == "blue" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._blue_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                    if player == "red" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._red_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                if valid:
-                    if not self.chariot_valid_moves(coordinates, valid_move):
-                        valid = False
-
-                if valid_move in enemy_legal_moves:
-                    valid = False
-
-            # If the move is deemed valid and legal, it will be added to the enemy_legal moves list
-                if valid:
-                    enemy_legal_moves.append(valid_move)
-
-        return enemy_legal_moves
+        return self._add_moves(self._piece_targets(_square(coordinates), "CH", player), enemy_legal_moves)
 
     def elephant_possible(self, coordinates, enemy_legal_moves, player):
         """
-        This is called on from the is_in_check method. It takes the elephant's coordinates, the player and the
-        list of the enemy's legal moves. The method checks a range of values to see what valid moves that the elephant
-        currently has. It returns the appended list of enemy_legal_moves
+        This is called on from the enemy_legal_moves method. It takes the elephant's coordinates, the player and the
+        list of the enemy's legal moves. The method reads the elephant's destinations from the elephant table and keeps
+        the ones whose two blocking squares are empty on the bitboards. It returns the appended list of
+        enemy_legal_moves
         """
-        for column in range(-2, 3):
-            for row in range(-4, 4):
-                new_column = coordinates[0] + column
-                new_row = coordinates[1] + row
-                valid_move = [new_column, new_row]
-
-                # Starts by indicating the move is valid, this will change to False if it finds a point where it is not valid
-                valid = True
-
-                if not self.on_board(valid_move[0], valid_move[1]):
-                    valid = False
-
-                if valid_move == coordinates:
-                    valid = False
-
-                if valid:
-                    if player == "blue" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._blue_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                    if player == "red" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._red_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                if valid:
-                    if not self.elephant_valid_moves(coordinates, valid_move):
-                        valid = False
-
-                if valid_move in enemy_legal_moves:
-                    valid = False
-
-                if valid:
-                    enemy_legal_moves.append(valid_move)
-        return enemy_legal_moves
+        return self._add_moves(self._piece_targets(_square(coordinates), "EL", player), enemy_legal_moves)
 
     def horse_possible(self, coordinates, enemy_legal_moves, player):
         """
-        This is called on from the is_in_check method. It takes the horse's coordinates, the player and the
-        list of the enemy's legal moves. The method checks a range of values to see what valid moves that the horse
-        currently has. It returns the appended list of enemy_legal_moves
+        This is called on from the enemy_legal_moves method. It takes the horse's coordinates, the player and the list
+        of the enemy's legal moves. The method reads the horse's destinations from the horse table and keeps the ones
+        whose blocking square is empty on the bitboards. It returns the appended list of enemy_legal_moves
         """
-        for column in range(-3, 3):
-            for row in range(-3, 3):
-                new_column = coordinates[0] + column
-                new_row = coordinates[1] + row
-                valid_move = [new_column, new_row]
-
-                # Starts by indicating the move is valid, this will change to False if it finds a point where it is not valid
-                valid = True
-
-                if not self.on_board(valid_move[0], valid_move[1]):
-                    valid = False
-
-                if valid_move == coordinates:
-                    valid = False
-
-                if valid:
-                    if player == "blue" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._blue_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                    if player == "red" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._red_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                if valid:
-                    if not self.horse_valid_moves(coordinates, valid_move):
-                        valid = False
-
-                if valid_move in enemy_legal_moves:
-                    valid = False
-
-                if valid:
-                    enemy_legal_moves.append(valid_move)
-        return enemy_legal_moves
+        return self._add_moves(self._piece_targets(_square(coordinates), "HR", player), enemy_legal_moves)
 
     def guard_possible(self, coordinates, enemy_legal_moves, player):
         """
-        This is called on from the is_in_check method. It takes the guard's coordinates, the player and the
-        list of the enemy's legal moves. The method checks a range of values to see what valid moves that the guard
-        currently has. It returns the appended list of enemy_legal_moves
+        This is called on from the enemy_legal_moves method. It takes the guard's coordinates, the player and the list
+        of the enemy's legal moves. The guard moves like the general, so the method reads its destinations from the
+        palace table. It returns the appended list of enemy_legal_moves
         """
-        for column in range(-1, 2):
-            for row in range(-1, 2):
-                new_column = coordinates[0] + column
-                new_row = coordinates[1] + row
-                valid_move = [new_column, new_row]
-
-                # Starts by indicating the move is valid, this will change to False if it finds a point where it is not valid
-                valid = True
-
-                if not self.on_board(valid_move[0], valid_move[1]):
-                    valid = False
-
-                if valid_move == coordinates:
-                    valid = False
-
-                if valid:
-                    if player == "blue" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._blue_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                    if player == "red" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._red_pieces.items():
-                            if value == valid_move:
-                                valid = False
-                if valid:
-                    if not self.guard_valid_moves(coordinates, valid_move):
-                        valid = False
-
-                if valid_move in enemy_legal_moves:
-                    valid = False
-
-                if valid:
-                    enemy_legal_moves.append(valid_move)
-        return enemy_legal_moves
+        return self._add_moves(self._piece_targets(_square(coordinates), "GD", player), enemy_legal_moves)
 
     def soldier_possible(self, coordinates, enemy_legal_moves, player):
         """
-        This is called on from the is_in_check method. It takes the soldier's coordinates, the player and the
-        list of the enemy's legal moves. The method checks a range of values to see what valid moves that the soldier
-        currently has. It returns the appended list of enemy_legal_moves
+        This is called on from the enemy_legal_moves method. It takes the soldier's coordinates, the player and the list
+        of the enemy's legal moves. The soldier's destinations depend on which way the player is moving forward, so the
+        method reads them from the soldier table for that player. It returns the appended list of enemy_legal_moves
         """
-        for column in range(-1, 2):
-            for row in range(-1, 2):
-                new_column = coordinates[0] + column
-                new_row = coordinates[1] + row
-                valid_move = [new_column, new_row]
-
-                # Starts by indicating the move is valid, this will change to False if it finds a point where it is not valid
-                valid = True
-
-                if not self.on_board(valid_move[0], valid_move[1]):
-                    valid = False
-
-                if valid_move == coordinates:
-                    valid = False
-
-                if valid:
-                    if player == "blue" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._blue_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                    if player == "red" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._red_pieces.items():
-                            if value == valid_move:
-                                valid = False
-
-                    if valid:
-                        if not self.soldier_valid_moves(coordinates, valid_move, player):
-                            valid = False
+        return self._add_moves(self._piece_targets(_square(coordinates), "SD", player), enemy_legal_moves)
 
-                if valid_move in enemy_legal_moves:
-                    valid = False
+    def cannon_possible(self, coordinates, enemy_legal_moves, player):
+        """
+        This is called on from the enemy_legal_moves method. It takes the cannon's coordinates, the player and the list
+        of the enemy's legal moves. The squares the cannon attacks by jumping over a screen are looked up from the
+        bitboards, leaving out the player's own pieces. It returns the appended list of enemy_legal_moves
+        """
+        return self._add_moves(self._piece_targets(_square(coordinates), "CA", player), enemy_legal_moves)
 
-                if valid:
-                    enemy_legal_moves.append(valid_move)
-        return enemy_legal_moves
+    def _piece_targets(self, square, piece, player):
+        """
+        Returns the bitboard of the squares the player's piece of the given type (such as "CH") on the square can move
+        to, following the piece's movement rules and leaving out the squares held by the player's own pieces. It
+        doesn't check whether the move would leave the player's general in check
+        """
+        return self._piece_attacks(square, piece, player) & ~self._bitboards[player]
 
-    def cannon_possible(self, coordinates, enemy_legal_moves, player):
+    def _piece_attacks(self, square, piece, player):
         """
-        This is called on from the is_in_check method. It takes the cannon's coordinates, the player and the
-        list of the enemy's legal moves. The method checks a range of values to see what valid moves that the cannon
-        currently has. It returns the appended list of enemy_legal_moves
+        Returns the bitboard of the squares the player's piece of the given type on the square attacks. These are the
+        squares it could move to if they were held by the other player, so squares held by the player's own pieces
+        are included
         """
-        for column in range(-9, 9):
-            for row in range(-9, 9):
-                new_column = coordinates[0] + column
-                new_row = coordinates[1] + row
-                valid_move = [new_column, new_row]
+        bitboards = self._bitboards
+        occupied = bitboards["blue"] | bitboards["red"]
 
-                # Starts by indicating the move is valid, this will change to False if it finds a point where it is not valid
-                valid = True
+        if piece == "CH":
+            targets = _chariot_attacks(square, occupied)
 
-                if not self.on_board(valid_move[0], valid_move[1]):
-                    valid = False
+        elif piece == "CA":
+            targets = _cannon_attacks(square, occupied, bitboards["CA"])
 
-                if valid_move == coordinates:
-                    valid = False
+        elif piece == "HR":
+            targets = 0
+            for to_square, first_step in _HORSE_MOVES[square]:
+                if not occupied & _BITS[first_step]:
+                    targets |= _BITS[to_square]
 
-                if valid:
-                    if player == "blue" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._blue_pieces.items():
-                            if value == valid_move:
-                                valid = False
+        elif piece == "EL":
+            targets = 0
+            for to_square, first_step, second_step in _ELEPHANT_MOVES[square]:
+                if not occupied & (_BITS[first_step] | _BITS[second_step]):
+                    targets |= _BITS[to_square]
 
-                    if player == "red" and self._board[coordinates[0]][coordinates[1]] != ' | ':
-                        for key, value in self._red_pieces.items():
-                            if value == valid_move:
-                                valid = False
+        elif piece == "SD":
+            targets = _SOLDIER_MASKS[player][square]
 
-                if valid:
-                    if not self.cannon_valid_moves(coordinates, valid_move):
-                        valid = False
+        else:
+            targets = _PALACE_MASKS[square]
+
+        return targets
 
-                if valid_move in enemy_legal_moves:
-                    valid = False
+    def _add_moves(self, targets, enemy_legal_moves):
+        """
+        Helper method for the possible move methods. Appends each square of the targets bitboard to the
+        enemy_legal_moves list as a list of coordinates, unless it is already in the list. Returns the list
+        """
+        for square in _bit_squares(targets):
+            if _SQUARE_COORDINATES[square] not in enemy_legal_moves:
+                enemy_legal_moves.append(list(_SQUARE_COORDINATES[square]))
 
-                if valid:
-                    enemy_legal_moves.append(valid_move)
         return enemy_legal_moves
 
     ################################ PIECES #######################################
@@ -846,91 +1414,9 @@ class JanggiGame:
         vertically. Within the palace, they are able to move along the diagonal line. They can move as far as they want
         across the board as long as there is no one in the way between the from and to coordinates.
         """
-        # It will loop through all the spaces from the starting point to the ending point. If
-        # it is all clear, it is a valid move. If one space before the ending point is taken, it will return false
-
-        # If moving vertically
-        if from_coordinates[0] == to_coordinates[0] and from_coordinates[1] > to_coordinates[1]:
-            for index in range(0, from_coordinates[1] + 1):
-                if self.on_board(from_coordinates[0], from_coordinates[1] - index):
-                    if self._board[from_coordinates[0]][from_coordinates[1] - index] != ' | ':
-                        if [from_coordinates[0], from_coordinates[1] - index] == from_coordinates:
-                            continue
-                        elif [from_coordinates[0], from_coordinates[1] - index] == to_coordinates:
-                            return True
-                        else:
-                            return False
-                    if [from_coordinates[0], from_coordinates[1] - index] == to_coordinates:
-                        return True
-            return True
-
-        elif from_coordinates[0] == to_coordinates[0] and from_coordinates[1] < to_coordinates[1]:
-            for index in range(0, to_coordinates[1] + 1):
-                if self.on_board(from_coordinates[0], from_coordinates[1] + index):
-                    if self._board[from_coordinates[0]][from_coordinates[1] + index] != ' | ':
-                        if [from_coordinates[0], from_coordinates[1] + index] == from_coordinates:
-                            continue
-                        elif [from_coordinates[0], from_coordinates[1] + index] == to_coordinates:
-                            return True
-                        else:
-                            return False
-                    if [from_coordinates[0], from_coordinates[1] + index] == to_coordinates:
-                        return True
-            return True
-
-        # If moving horizontally
-        elif from_coordinates[1] == to_coordinates[1] and from_coordinates[0] < to_coordinates[0]:
-            for index in range(0, to_coordinates[0] + 1):
-                if self.on_board(from_coordinates[0] + index, from_coordinates[1]):
-                    if self._board[from_coordinates[0] + index][from_coordinates[1]] != ' | ':
-                        if [from_coordinates[0] + index, from_coordinates[1]] == from_coordinates:
-                            continue
-                        if [from_coordinates[0] + index, from_coordinates[1]] == to_coordinates:
-                            return True
-                        else:
-                            return False
-                    if [from_coordinates[0] + index, from_coordinates[1]] == to_coordinates:
-                        return True
-            return True
-
-        elif from_coordinates[1] == to_coordinates[1] and to_coordinates[0] < from_coordinates[0]:
-            for index in range(0, from_coordinates[0] + 1):
-                if self.on_board(from_coordinates[0] - index, from_coordinates[1]):
-                    if self._board[from_coordinates[0] - index][from_coordinates[1]] != ' | ':
-                        if [from_coordinates[0] - index, from_coordinates[1]] == from_coordinates:
-                            continue
-                        if [from_coordinates[0] - index, from_coordinates[1]] == to_coordinates:
-                            return True
-                        else:
-                            return False
-                    if [from_coordinates[0] - index, from_coordinates[1]] == to_coordinates:
-                        return True
-            return True
-
-        elif self.within_palace(from_coordinates[0], from_coordinates[1]) and self.within_palace(to_coordinates[0], to_coordinates[1]):
-            # If within the red palace
-            if [from_coordinates[0] + 1, from_coordinates[1] + 1] == to_coordinates:
-                return True
-            if [from_coordinates[0] + 2, from_coordinates[1] + 2] == to_coordinates:
-                return True
-            if [from_coordinates[0] - 1, from_coordinates[1] + 1] == to_coordinates:
-                return True
-            if [from_coordinates[0] - 2, from_coordinates[1] + 2] == to_coordinates:
-                return True
-
-            # if within the blue palace
-            if [from_coordinates[0] - 1, from_coordinates[1] - 1] == to_coordinates:
-                return True
-            if [from_coordinates[0] - 2, from_coordinates[1] - 2] == to_coordinates:
-                return True
-            if [from_coordinates[0] + 1, from_coordinates[1] - 1] == to_coordinates:
-                return True
-            if [from_coordinates[0] + 2, from_coordinates[1] - 2] == to_coordinates:
-                return True
-
-            return False
-        else:
-            return False
+        # The move is valid if the ending point is one of the squares the chariot attacks from the starting point
+        attacks = _chariot_attacks(_square(from_coordinates), self._occupied())
+        return bool(attacks & _BITS[_square(to_coordinates)])
 
     def general_valid_moves(self, from_coordinates, to_coordinates):
         """
@@ -939,29 +1425,7 @@ class JanggiGame:
         move either horizontally or vertically within the palace. They are also able to move along the diagonal line in
         the palace.
         """
-
-        if not self.within_palace(to_coordinates[0], to_coordinates[1]):
-            return False
-
-        # Validating that the move is within one spot from their current position
-        if [from_coordinates[0] + 1, from_coordinates[1]] == to_coordinates:
-            return True
-        elif [from_coordinates[0] - 1, from_coordinates[1]] == to_coordinates:
-            return True
-        elif [from_coordinates[0], from_coordinates[1] + 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0], from_coordinates[1] - 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0] + 1, from_coordinates[1] + 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0] + 1, from_coordinates[1] - 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0] - 1, from_coordinates[1] + 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0] - 1, from_coordinates[1] - 1] == to_coordinates:
-            return True
-        else:
-            return False
+        return _square(to_coordinates) in _PALACE_MOVES[_square(from_coordinates)]
 
     def elephant_valid_moves(self, from_coordinates, to_coordinates):
         """
@@ -971,90 +1435,13 @@ class JanggiGame:
         from the starting position. It will check each spot en route to the to coordinates to make sure
         no piece is blocking the way
         """
-        # If the first move is vertical
-        if [from_coordinates[0] - 2, from_coordinates[1] - 3] == to_coordinates:
-            if self._board[from_coordinates[0]][from_coordinates[1] - 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] - 1][from_coordinates[1] - 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] - 1][from_coordinates[1] - 2] != ' | ':
-                return False
-            else:
-                return True
-
-        if [from_coordinates[0] - 2, from_coordinates[1] + 3] == to_coordinates:
-            if self._board[from_coordinates[0]][from_coordinates[1] + 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 1][from_coordinates[1] + 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] - 1][from_coordinates[1] + 2] != ' | ':
-                return False
-            else:
-                return True
-
-        if [from_coordinates[0] + 2, from_coordinates[1] - 3] == to_coordinates:
-            if self._board[from_coordinates[0]][from_coordinates[1] - 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 1][from_coordinates[1] - 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 1][from_coordinates[1] - 2] != ' | ':
-                return False
-            else:
-                return True
-
-        if [from_coordinates[0] + 2, from_coordinates[1] + 3] == to_coordinates:
-            if self._board[from_coordinates[0]][from_coordinates[1] + 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 1][from_coordinates[1] + 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 1][from_coordinates[1] + 2] != ' | ':
-                return False
-            else:
-                return True
-
-            # if the first move is horizontal
-        if [from_coordinates[0] - 3, from_coordinates[1] - 2] == to_coordinates:
-            if self._board[from_coordinates[0] - 1][from_coordinates[1]] != ' | ':
-                return False
-            if self._board[from_coordinates[0] - 2][from_coordinates[1] - 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] - 3][from_coordinates[1] - 2] != ' | ':
-                return False
-            else:
-                return True
-
-        if [from_coordinates[0] + 3, from_coordinates[1] - 2] == to_coordinates:
-            if self._board[from_coordinates[0] + 1][from_coordinates[1]] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 2][from_coordinates[1] - 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 3][from_coordinates[1] - 2] != ' | ':
-                return False
-            else:
-                return True
+        to_square = _square(to_coordinates)
 
-        if [from_coordinates[0] - 3, from_coordinates[1] + 2] == to_coordinates:
-            if self._board[from_coordinates[0] - 1][from_coordinates[1]] != ' | ':
-                return False
-            if self._board[from_coordinates[0] - 2][from_coordinates[1] + 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] - 3][from_coordinates[1] + 2] != ' | ':
-                return False
-            else:
-                return True
+        for square, first_step, second_step in _ELEPHANT_MOVES[_square(from_coordinates)]:
+            if square == to_square:
+                return not self._occupied() & (_BITS[first_step] | _BITS[second_step])
 
-        if [from_coordinates[0] + 3, from_coordinates[1] + 2] == to_coordinates:
-            if self._board[from_coordinates[0] + 1][from_coordinates[1]] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 2][from_coordinates[1] + 1] != ' | ':
-                return False
-            if self._board[from_coordinates[0] + 3][from_coordinates[1] + 2] != ' | ':
-                return False
-            else:
-                return True
-
-        else:
-            return False
+        return False
 
     def guard_valid_moves(self, from_coordinates, to_coordinates):
         """
@@ -1063,27 +1450,7 @@ class JanggiGame:
         to move either horizontally or vertically within the palace. They are also able to move along
         the diagonal line.
         """
-        if not self.within_palace(to_coordinates[0], to_coordinates[1]):
-            return False
-
-        if [from_coordinates[0] + 1, from_coordinates[1]] == to_coordinates:
-            return True
-        elif [from_coordinates[0] - 1, from_coordinates[1]] == to_coordinates:
-            return True
-        elif [from_coordinates[0], from_coordinates[1] + 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0], from_coordinates[1] - 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0] + 1, from_coordinates[1] + 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0] + 1, from_coordinates[1] - 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0] - 1, from_coordinates[1] + 1] == to_coordinates:
-            return True
-        elif [from_coordinates[0] - 1, from_coordinates[1] - 1] == to_coordinates:
-            return True
-        else:
-            return False
+        return _square(to_coordinates) in _PALACE_MOVES[_square(from_coordinates)]
 
     def cannon_valid_moves(self, from_coordinates, to_coordinates):
         """
@@ -1093,124 +1460,8 @@ class JanggiGame:
         the diagonal line. In order to move, they have to jump over a piece. They do not capture the piece they jump
         over, but can capture another piece after they jump. They are not able to capture or jump over another cannon
         """
-        counter = 0         # Counter to see how many pieces between the from and to coordinates
-        indexes = []        # list to hold the coordinates of the piece they will have to jump over
-        cannon_coordinates = []
-        general_coordinates = []
-
-        # Moving vertically
-        if from_coordinates[0] == to_coordinates[0] and from_coordinates[1] > to_coordinates[1]:
-            for index in range(0, from_coordinates[1]):
-                if self.on_board(from_coordinates[0], from_coordinates[1] - index):
-                    if self._board[from_coordinates[0]][from_coordinates[1] - index] != ' | ':
-                        if (from_coordinates[1] - index) < to_coordinates[1]:
-                            counter += 0
-                        elif (from_coordinates[1] - index) == from_coordinates[1]:
-                            counter += 0
-                        elif (from_coordinates[1] - index) == to_coordinates[1]:
-                            counter += 0
-                        else:
-                            counter += 1
-                            indexes.append([from_coordinates[0], from_coordinates[1] - index])
-
-        elif from_coordinates[0] == to_coordinates[0] and to_coordinates[1] > from_coordinates[1]:
-            for index in range(0, to_coordinates[1]):
-                if self.on_board(from_coordinates[0], from_coordinates[1] + index):
-                    if self._board[from_coordinates[0]][from_coordinates[1] + index] != ' | ':
-                        if (from_coordinates[1] + index) > to_coordinates[1]:
-                            counter += 0
-                        elif (from_coordinates[1] + index) == from_coordinates[1]:
-                            counter += 0
-                        elif (from_coordinates[1] + index) == to_coordinates[1]:
-                            counter += 0
-                        else:
-                            counter += 1
-                            indexes.append([from_coordinates[0], from_coordinates[1] + index])
-
-        # If moving horizontally
-        elif from_coordinates[1] == to_coordinates[1] and from_coordinates[0] > to_coordinates[0]:
-            for index in range(0, from_coordinates[0]):
-                if self.on_board(from_coordinates[0] - index, from_coordinates[1]):
-                    if self._board[from_coordinates[0] - index][from_coordinates[1]] != ' | ':
-                        if (from_coordinates[0] - index) < to_coordinates[0]:
-                            counter += 0
-                        elif (from_coordinates[0] - index) == from_coordinates[0]:
-                            counter += 0
-                        elif (from_coordinates[0] - index) == to_coordinates[0]:
-                            counter += 0
-                        else:
-                            counter += 1
-                            indexes.append([from_coordinates[0] - index, from_coordinates[1]])
-
-        elif from_coordinates[1] == to_coordinates[1] and to_coordinates[0] > from_coordinates[0]:
-            for index in range(0, to_coordinates[0]):
-                if self.on_board(from_coordinates[0] + index, from_coordinates[1]):
-                    if self._board[from_coordinates[0] + index][from_coordinates[1]] != ' | ':
-                        if (from_coordinates[0] + index) > to_coordinates[0]:
-                            counter += 0
-                        elif (from_coordinates[0] + index) == from_coordinates[0]:
-                            counter += 0
-                        elif (from_coordinates[0] + index) == to_coordinates[0]:
-                            counter += 0
-                        else:
-                            counter += 1
-                            indexes.append([from_coordinates[0] + index, from_coordinates[1]])
-
-        elif self.within_palace(from_coordinates[0], from_coordinates[1]) and self.within_palace(to_coordinates[0], to_coordinates[1]):
-            if [from_coordinates[0] + 2, from_coordinates[1] + 2] == to_coordinates:
-                if [from_coordinates[0] + 1, from_coordinates[1] + 1] != ' | ':
-                    counter += 1
-                    indexes.append([from_coordinates[0] + 1, from_coordinates[1] + 1])
-                else:
-                    counter += 0
-
-            if [from_coordinates[0] + 2, from_coordinates[1] - 2] == to_coordinates:
-                if [from_coordinates[0] + 1, from_coordinates[1] - 1] != ' | ':
-                    counter += 1
-                    indexes.append([from_coordinates[0] + 2, from_coordinates[1] - 2])
-                else:
-                    counter += 0
-
-            if [from_coordinates[0] - 2, from_coordinates[1] + 2] == to_coordinates:
-                if [from_coordinates[0] - 1, from_coordinates[1] + 1] != ' | ':
-                    counter += 1
-                    indexes.append([from_coordinates[0] - 2, from_coordinates[1] + 2])
-                else:
-                    counter += 0
-
-            if [from_coordinates[0] - 2, from_coordinates[1] - 2] == to_coordinates:
-                if [from_coordinates[0] - 1, from_coordinates[1] - 1] != ' | ':
-                    counter += 1
-                    indexes.append([from_coordinates[0] - 2, from_coordinates[1] - 2])
-                else:
-                    counter += 0
-
-        # After determining that the move is valid, it will compare the coordinates in the indexes to make sure that
-        # they are not jumping over or capturing a cannon. If it is a cannon, it will return False.
-        for key, value in list(self._blue_pieces.items()):
-            if key == "CA" or key == "CA1":
-                cannon_coordinates = value
-                if cannon_coordinates in indexes or cannon_coordinates == to_coordinates:
-                    return False
-
-        # After determining that the move is valid, it will compare the coordinates in the indexes to make sure that
-        # they are not jumping over or capturing a cannon. If it is a cannon, it will return False.
-        for key, value in list(self._red_pieces.items()):
-            if key == "CA" or key == "CA1":
-                cannon_coordinates = value
-                if cannon_coordinates in indexes or cannon_coordinates == to_coordinates:
-                    return False
-
-        #  Will make sure that it is not capturing the general
-            if key == "GN":
-                general_coordinates = value
-                if general_coordinates == to_coordinates:
-                    return False
-
-        if counter == 1:
-            return True
-        else:
-            return False
+        attacks = _cannon_attacks(_square(from_coordinates), self._occupied(), self._bitboards["CA"])
+        return bool(attacks & _BITS[_square(to_coordinates)])
 
     def soldier_valid_moves(self, from_coordinates, to_coordinates, player):
         """
@@ -1219,38 +1470,7 @@ class JanggiGame:
          move either horizontally or forward. Within the palace, they are able to move along the diagonal line. They are
          not able to move backward.
         """
-
-        if player == "blue":
-            if [from_coordinates[0] + 1, from_coordinates[1]] == to_coordinates:
-                return True
-            elif [from_coordinates[0] - 1, from_coordinates[1]] == to_coordinates:
-                return True
-            elif [from_coordinates[0], from_coordinates[1] - 1] == to_coordinates:
-                return True
-            elif self.within_palace(from_coordinates[0], from_coordinates[1]) and self.within_palace(to_coordinates[0], to_coordinates[1]):
-                if [from_coordinates[0] - 1, from_coordinates[1] - 1]:
-                    return True
-            elif self.within_palace(from_coordinates[0], from_coordinates[1]) and self.within_palace(to_coordinates[0], to_coordinates[1]):
-                if [from_coordinates[0] + 1, from_coordinates[1] - 1]:
-                    return True
-            else:
-                return False
-
-        if player == "red":
-            if [from_coordinates[0] + 1, from_coordinates[1]] == to_coordinates:
-                return True
-            elif [from_coordinates[0] - 1, from_coordinates[1]] == to_coordinates:
-                return True
-            elif [from_coordinates[0], from_coordinates[1] + 1] == to_coordinates:
-                return True
-            elif self.within_palace(from_coordinates[0], from_coordinates[1]) and self.within_palace(to_coordinates[0], to_coordinates[1]):
-                if [from_coordinates[0] - 1, from_coordinates[1] + 1]:
-                    return True
-            elif self.within_palace(from_coordinates[0], from_coordinates[1]) and self.within_palace(to_coordinates[0], to_coordinates[1]):
-                if [from_coordinates[0] + 1, from_coordinates[1] + 1]:
-                    return True
-            else:
-                return False
+        return _square(to_coordinates) in _SOLDIER_MOVES[player][_square(from_coordinates)]
 
     def horse_valid_moves(self, from_coordinates, to_coordinates):
         """
@@ -1260,59 +1480,29 @@ class JanggiGame:
         from the starting position. It will check each spot en route to the to coordinates to make sure
         no piece is blocking the way
         """
-        # if moving vertically
-        if [from_coordinates[0] - 1, from_coordinates[1] + 2] == to_coordinates:
-            if self._board[from_coordinates[0]][from_coordinates[1] + 1] != ' | ':
-                return False
-            else:
-                return True
+        to_square = _square(to_coordinates)
 
-        if [from_coordinates[0] + 1, from_coordinates[1] - 2] == to_coordinates:
-            if self._board[from_coordinates[0]][from_coordinates[1] - 1] != ' | ':
-                return False
-            else:
-                return True
+        for square, first_step in _HORSE_MOVES[_square(from_coordinates)]:
+            if square == to_square:
+                return not self._occupied() & _BITS[first_step]
 
-        if [from_coordinates[0] + 1, from_coordinates[1] + 2] == to_coordinates:
-            if self._board[from_coordinates[0]][from_coordinates[1] + 1] != ' | ':
-                return False
-            else:
-                return True
-
-        if [from_coordinates[0] - 1, from_coordinates[1] - 2] == to_coordinates:
-            if self._board[from_coordinates[0]][from_coordinates[1] - 1] != ' | ':
-                return False
-            else:
-                return True
-
-        # If moving horizontally
-        if [from_coordinates[0] + 2, from_coordinates[1] - 1] == to_coordinates:
-            if self._board[from_coordinates[0] + 1][from_coordinates[1]] != ' | ':
-                return False
-            else:
-                return True
+        return False
 
-        if [from_coordinates[0] + 2, from_coordinates[1] + 1] == to_coordinates:
-            if self._board[from_coordinates[0] + 1][from_coordinates[1]] != ' | ':
-                return False
-            else:
-                return True
-
-        if [from_coordinates[0] - 2, from_coordinates[1] - 1] == to_coordinates:
-            if self._board[from_coordinates[0] - 1][from_coordinates[1]] != ' | ':
-                return False
-            else:
-                return True
+    ################################ BOARD #######################################
 
-        if [from_coordinates[0] - 2, from_coordinates[1] + 1] == to_coordinates:
-            if self._board[from_coordinates[0] - 1][from_coordinates[1]] != ' | ':
-                return False
-            else:
-                return True
-        else:
-            return False
+    def _pieces_of(self, player):
+        """
+        Returns the dictionary that holds the coordinates of each of the player's pieces
+        """
+        if player == "blue":
+            return self._blue_pieces
+        return self._red_pieces
 
-    ################################ BOARD #######################################
+    def _occupied(self):
+        """
+        Returns the bitboard of every occupied square
+        """
+        return self._bitboards["blue"] | self._bitboards["red"]
 
     def on_board(self, column, row):
         """
@@ -1336,62 +1526,286 @@ class JanggiGame:
         else:
             return False
 
+    def create_occupants(self):
+        """
+        Method to set up the square index. It is a list with an entry for each of the 90 squares of the board, holding
+        the player and the piece's name for the piece on that square, or None if the square is empty. It is kept in
+        sync with the pieces dictionaries so that finding the piece on a square doesn't need to search them
+        """
+        occupants = [None] * (_COLUMNS * _ROWS)
+        for key, value in self._blue_pieces.items():
+            occupants[_square(value)] = ("blue", key)
+
+        for key, value in self._red_pieces.items():
+            occupants[_square(value)] = ("red", key)
+        return occupants
+
+    def create_bitboards(self):
+        """
+        Method to set up the bitboards from the square index. There is a bitboard for the squares held by each player
+        and one for the squares held by each type of piece, whichever player it belongs to
+        """
+        bitboards = dict.fromkeys(("blue", "red") + _PIECE_TYPES, 0)
+        for square, occupant in enumerate(self._occupants):
+            if occupant is not None:
+                bitboards[occupant[0]] |= _BITS[square]
+                bitboards[occupant[1][:2]] |= _BITS[square]
+        return bitboards
+
+    def create_position_key(self):
+        """
+        Method to compute the Zobrist key of the position from scratch, from the square index, the player's turn and
+        the check state. After this the key is kept up to date by the moves
+        """
+        position_key = 0
+        for square, occupant in enumerate(self._occupants):
+            if occupant is not None:
+                position_key ^= _ZOBRIST_PIECES[occupant[0]][occupant[1][:2]][square]
+
+        if self._player_turn == "red":
+            position_key ^= _ZOBRIST_RED_TURN
+
+        if self._in_check is not None:
+            position_key ^= _ZOBRIST_IN_CHECK
+        return position_key
+
+    def create_attack_maps(self):
+        """
+        Method to set up the attack maps from the square index and the bitboards. The first is a list with the bitboard
+        of the squares attacked by the piece on each square, or 0 for an empty square. The second is a dictionary with
+        a list for each player counting how many of the player's pieces attack each square. After this the maps are
+        kept up to date by the moves, which only work out again the attacks of the pieces a move can affect
+        """
+        attack_sets = [0] * (_COLUMNS * _ROWS)
+        attack_counts = {"blue": [0] * (_COLUMNS * _ROWS), "red": [0] * (_COLUMNS * _ROWS)}
+        for square, occupant in enumerate(self._occupants):
+            if occupant is not None:
+                attack_sets[square] = self._piece_attacks(square, occupant[1][:2], occupant[0])
+                for attacked_square in _bit_squares(attack_sets[square]):
+                    attack_counts[occupant[0]][attacked_square] += 1
+        return attack_sets, attack_counts
+
     def create_board(self):
         """
-        Method to set up the parameters of the game board. Sets up the size, icon for empty squares and
-        initializes the pieces with their color and abbreviation
-        """
-        game_board = []
-        for column in range(9):
-            board_row = []
-            for row in range(10):
-                board_row.append(' | ')
-
-            game_board.append(board_row)
-        game_board[0][0] = colored('CH ', 'red')
-        game_board[1][0] = colored('EL ', 'red')
-        game_board[2][0] = colored('HR ', 'red')
-        game_board[1][2] = colored('GD ', 'red')
-        game_board[5][2] = colored('GD ', 'red')
-        game_board[6][0] = colored('EL ', 'red')
-        game_board[7][0] = colored('HR ', 'red')
-        game_board[8][0] = colored('CH ', 'red')
-        game_board[4][1] = colored('GN ', 'red')
-
-        game_board[3][2] = colored('CA ', 'red')
-        game_board[7][2] = colored('CA ', 'red')
-        game_board[0][3] = colored('SD ', 'red')
-        game_board[2][3] = colored('SD ', 'red')
-        game_board[4][3] = colored('SD ', 'red')
-        game_board[6][3] = colored('SD ', 'red')
-        game_board[8][3] = colored('SD ', 'red')
-
-        game_board[0][9] = colored('CH ', 'blue')
-        game_board[1][9] = colored('EL ', 'blue')
-        game_board[2][9] = colored('HR ', 'blue')
-        game_board[3][7] = colored('GD ', 'blue')
-        game_board[5][7] = colored('GD ', 'blue')
-        game_board[6][9] = colored('EL ', 'blue')
-        game_board[7][9] = colored('HR ', 'blue')
-        game_board[8][9] = colored('CH ', 'blue')
-        game_board[4][8] = colored('GN ', 'blue')
-        game_board[1][7] = colored('CA ', 'blue')
-        game_board[7][7] = colored('CA ', 'blue')
-        game_board[0][6] = colored('SD ', 'blue')
-        game_board[2][6] = colored('SD ', 'blue')
-        game_board[4][6] = colored('SD ', 'blue')
-        game_board[6][6] = colored('SD ', 'blue')
-        game_board[8][6] = colored('SD ', 'blue')
+        Method to set up the game board from the square index. The board is a list with an entry for each of the 90
+        squares, holding the code of the piece on that square, or 0 for an empty square. Colours are only added when
+        the board is displayed
+        """
+        game_board = [0] * (_COLUMNS * _ROWS)
+        for square, occupant in enumerate(self._occupants):
+            if occupant is not None:
+                game_board[square] = _PIECE_CODES[occupant[0]][occupant[1][:2]]
         return game_board
 
     def display(self):
         """
-        Method to display the game board to the console.
+        Method to display the game board to the console. The pieces are coloured with termcolor, which is only imported
+        here. If termcolor isn't installed, the board is displayed without colours
         """
+        try:
+            from termcolor import colored
+        except ImportError:
+            def colored(text, color):
+                return text
+
         counter = 0
         print(' a ', ' b ', ' c ', ' d ', ' e ', ' f ', ' g ', ' h ', ' i ')
         for index in range(10):
             for index1 in range(9):
-                print(self._board[index1][index], end=' ')
+                code = self._board[index * _COLUMNS + index1]
+                if code == 0:
+                    print(' | ', end=' ')
+                else:
+                    player, piece = _CODE_PIECES[code]
+                    print(colored(piece + ' ', player), end=' ')
             counter += 1
             print(counter)
+
+    ################################ NOTATION #####################################
+
+    def to_fen(self):
+        """
+        Returns the position in a FEN-style text notation. The rows of the board are listed from row 1 to row 10 and
+        separated by "/". Each piece is a letter, capital for blue and small for red (R chariot, N horse, B elephant,
+        A guard, K general, C cannon, P soldier), and each run of empty squares is its length. The rows are followed by
+        the player to move ("b" for blue or "r" for red) and the player in check ("b", "r", or "-" for neither), such
+        as "rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNR b -" for the starting position
+        """
+        rows = []
+        for row in range(_ROWS):
+            text = ""
+            empty = 0
+            for code in self._board[row * _COLUMNS:(row + 1) * _COLUMNS]:
+                if code == 0:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += _CODE_LETTERS[code]
+            if empty:
+                text += str(empty)
+            rows.append(text)
+
+        in_check = self._in_check[0] if self._in_check is not None else "-"
+        return "/".join(rows) + " " + self._player_turn[0] + " " + in_check
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Takes a position in the notation of to_fen and returns a new game set up in that position. The player in check
+        can be left out, and is then worked out from the board. The pieces are named in square order, so the first
+        chariot found is "CH" and the next is "CH1". Raises ValueError if the notation isn't a valid position
+        """
+        fields = fen.split()
+        if len(fields) not in (2, 3) or fields[1] not in ("b", "r"):
+            raise ValueError("invalid position notation " + repr(fen))
+
+        rows = fields[0].split("/")
+        if len(rows) != _ROWS:
+            raise ValueError("invalid position notation " + repr(fen))
+
+        board = []
+        for text in rows:
+            row = []
+            for letter in text:
+                if letter.isdigit():
+                    row.extend([0] * int(letter))
+                elif letter in _LETTER_CODES:
+                    row.append(_LETTER_CODES[letter])
+                else:
+                    raise ValueError("invalid piece " + repr(letter) + " in " + repr(fen))
+            if len(row) != _COLUMNS:
+                raise ValueError("invalid position notation " + repr(fen))
+            board.extend(row)
+
+        player_turn = "blue" if fields[1] == "b" else "red"
+        if len(fields) == 2:
+            return cls._from_board(board, player_turn, None, find_check=True)
+        if fields[2] not in ("b", "r", "-"):
+            raise ValueError("invalid position notation " + repr(fen))
+        return cls._from_board(board, player_turn, {"b": "blue", "r": "red", "-": None}[fields[2]])
+
+    def to_bytes(self):
+        """
+        Returns the position as 46 bytes. The first 45 bytes hold the piece codes of the board, two squares to a byte
+        with the lower square in the high four bits, and the last byte holds the flags: 1 if red is to move, 2 if blue
+        is in check and 4 if red is in check
+        """
+        board = self._board
+        flags = (self._player_turn == "red") | (self._in_check == "blue") << 1 | (self._in_check == "red") << 2
+        return bytes([board[square] << 4 | board[square + 1] for square in range(0, _COLUMNS * _ROWS, 2)] + [flags])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Takes a position in the binary form of to_bytes and returns a new game set up in that position. The pieces are
+        named in square order, the same as from_fen. Raises ValueError if the data isn't a valid position
+        """
+        if len(data) != _COLUMNS * _ROWS // 2 + 1:
+            raise ValueError("a position is %d bytes, not %d" % (_COLUMNS * _ROWS // 2 + 1, len(data)))
+
+        board = []
+        for byte in data[:-1]:
+            board.append(byte >> 4)
+            board.append(byte & 15)
+
+        flags = data[-1]
+        if flags > 7 or flags & 6 == 6:
+            raise ValueError("invalid position flags %d" % flags)
+        in_check = "blue" if flags & 2 else "red" if flags & 4 else None
+        return cls._from_board(board, "red" if flags & 1 else "blue", in_check)
+
+    @classmethod
+    def _from_board(cls, board, player_turn, in_check, find_check=False):
+        """
+        Returns a new game with the pieces of a list of 90 piece codes, the player to move and the player in check. If
+        find_check is True, the player in check is worked out from the board instead. Each player has to have exactly
+        one general, standing in their own palace, otherwise ValueError is raised
+        """
+        game = cls.__new__(cls)
+        game._letters = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i']
+        game._game_state = 'UNFINISHED'
+        game._player_turn = player_turn
+        game._in_check = in_check
+        game._blue_pieces = {}
+        game._red_pieces = {}
+
+        # Names the pieces in square order, the first of a type without a number and the next ones numbered from 1
+        for square, code in enumerate(board):
+            if code == 0:
+                continue
+            if code not in _CODE_PIECES:
+                raise ValueError("invalid piece code %d" % code)
+            player, piece = _CODE_PIECES[code]
+            pieces = game._pieces_of(player)
+            number = 0
+            while (piece + str(number) if number else piece) in pieces:
+                number += 1
+            pieces[piece + str(number) if number else piece] = list(_SQUARE_COORDINATES[square])
+
+        for player, pieces in (("blue", game._blue_pieces), ("red", game._red_pieces)):
+            if "GN" not in pieces or "GN1" in pieces:
+                raise ValueError("each player needs exactly one general")
+
+            # The general can never leave the palace, which is on rows 8 to 10 for blue and rows 1 to 3 for red
+            column, row = pieces["GN"]
+            if not _in_palace(column, row) or (row >= 7) != (player == "blue"):
+                raise ValueError("the %s general is outside the %s palace" % (player, player))
+
+        game._set_up()
+        if find_check:
+            for player in ("blue", "red"):
+                if game._general_attacked(player):
+                    game._set_in_check(player)
+        return game
+
+    ################################ PROFILING ###################################
+
+    def enable_profiling(self, profiler=None):
+        """
+        Starts recording timings into the profiler, or into a new Profiler if none is given, and returns it. Each phase
+        of make_move is timed: looking up the squares, checking the pieces on them, the piece's valid moves method,
+        making sure the move doesn't leave the player in check, and looking for check and checkmate on the other
+        player. Each call of the methods in _PROFILED_METHODS is timed as well. The methods are only wrapped while
+        profiling is enabled, so a game that isn't being profiled runs the same code as before. A profiled game can
+        still be pickled, for example to send it to the workers of parallel_search or simulate, but the copy it is
+        unpickled into isn't profiled, the same as a clone
+        """
+        self.disable_profiling()
+        if profiler is None:
+            profiler = Profiler()
+        for name in _PROFILED_METHODS:
+            setattr(self, name, profiler.wrap(name, getattr(self, name)))
+        self._profiler = profiler
+        return profiler
+
+    def disable_profiling(self):
+        """
+        Stops recording timings. The profiler keeps the timings recorded so far
+        """
+        if self._profiler is not None:
+            for name in _PROFILED_METHODS:
+                del self.__dict__[name]
+            self._profiler = None
+
+    def get_profile(self):
+        """
+        Returns the timings recorded so far as a dictionary, in the form of Profiler.snapshot, or None if profiling
+        isn't enabled
+        """
+        if self._profiler is None:
+            return None
+        return self._profiler.snapshot()
+
+    def __getstate__(self):
+        """
+        Returns the game's attributes for pickling, leaving out the wrapped methods and the profiler, which hold
+        functions that can't be pickled
+        """
+        state = self.__dict__.copy()
+        if self._profiler is not None:
+            for name in _PROFILED_METHODS:
+                del state[name]
+            state["_profiler"] = None
+        return state
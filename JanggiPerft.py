@@ -0,0 +1,92 @@
+import sys
+import time
+
+from JanggiGame import JanggiGame, square_number
+
+
+# Reference positions for perft. Each position is given as a name, the moves played from the starting position in
+# make_move notation, and the expected number of leaf nodes at each depth. Passes are counted as moves.
+PERFT_POSITIONS = [
+    ("start", [], {1: 32, 2: 1024, 3: 33506, 4: 1095844}),
+
+    ("open files", [("h10", "g8"), ("e2", "e1"), ("b10", "d7"), ("a1", "a3"), ("h8", "d8"), ("c4", "d4"), ("d8", "d4"),
+                    ("a3", "a2"), ("d4", "g4"), ("a2", "a3"), ("g4", "a4"), ("h1", "i3"), ("a10", "a9"), ("e1", "e2"),
+                    ("a4", "i4"), ("e4", "d4"), ("i4", "i1"), ("a3", "a7"), ("i1", "f1"), ("d4", "e4"), ("a9", "a7"),
+                    ("e2", "f1"), ("a7", "a6"), ("e4", "e5"), ("g7", "h7"), ("b1", "d4"), ("c10", "a9"), ("d4", "a6"),
+                    ("h7", "g7"), ("i3", "h1"), ("e9", "f9"), ("d1", "e1"), ("g7", "g6"), ("a6", "d4"), ("a9", "b7"),
+                    ("d4", "g6"), ("i10", "i8"), ("g6", "i3"), ("c7", "c6"), ("c1", "e2")],
+     {1: 34, 2: 492, 3: 17110}),
+
+    ("cannons", [("e7", "f7"), ("h1", "i3"), ("c7", "b7"), ("e4", "f4"), ("e9", "d8"), ("e2", "e3"), ("b8", "b4"),
+                 ("a4", "b4"), ("h8", "a8"), ("b3", "b7"), ("f7", "e7"), ("b7", "g7"), ("a8", "a1"), ("h3", "b3"),
+                 ("a1", "c1"), ("b3", "b8"), ("e7", "f7"), ("g7", "a7"), ("c10", "b8"), ("a7", "i7"), ("c1", "c10"),
+                 ("i7", "c7"), ("i10", "i4"), ("g1", "i4"), ("d8", "e8"), ("c7", "c1"), ("a10", "a9"), ("c1", "c7"),
+                 ("f10", "f9"), ("f4", "e4"), ("f7", "f6"), ("c4", "c5"), ("a9", "c9"), ("c7", "c1"), ("c10", "c5"),
+                 ("i4", "f6"), ("c9", "c8"), ("f6", "c8"), ("e8", "e9"), ("g4", "g5")],
+     {1: 23, 2: 743, 3: 17459}),
+
+    ("red in check", [("h10", "g8"), ("e2", "e1"), ("b10", "d7"), ("a1", "a3"), ("h8", "d8"), ("c4", "d4"),
+                      ("d8", "d4"), ("a3", "a2"), ("g7", "g6"), ("i1", "i2"), ("d4", "g4"), ("a2", "e2"),
+                      ("c10", "d8"), ("a4", "a5"), ("a10", "a9"), ("h1", "g3"), ("g4", "g1")],
+     {1: 1, 2: 46, 3: 1447}),
+]
+
+
+def position_from_moves(moves):
+    """
+    Takes a list of (from_square, to_square) moves in make_move notation and returns a new game with the moves pushed
+    from the starting position. Each move has to be one of the legal moves of the position it is played in, otherwise
+    a ValueError is raised
+    """
+    game = JanggiGame()
+    for from_square, to_square in moves:
+        move = square_number(from_square) * 90 + square_number(to_square)
+        if move not in game.legal_moves():
+            raise ValueError("illegal move " + from_square + " " + to_square)
+        game.push(move)
+    return game
+
+
+def run_perft(game, depth):
+    """
+    Runs perft on the game to the depth and returns the number of nodes, the time it took in seconds and the number of
+    nodes per second
+    """
+    start = time.perf_counter()
+    nodes = game.perft(depth)
+    seconds = time.perf_counter() - start
+    return nodes, seconds, nodes / seconds if seconds else 0.0
+
+
+def check_perft(max_depth=3, output=sys.stdout):
+    """
+    Runs perft on each of the reference positions for every depth up to max_depth that has an expected count, and
+    writes a line for each run with the node count, the expected count and the nodes per second. Returns True if every
+    count matched
+    """
+    all_passed = True
+    total_nodes = 0
+    total_seconds = 0.0
+
+    for name, moves, expected_counts in PERFT_POSITIONS:
+        game = position_from_moves(moves)
+        for depth in sorted(expected_counts):
+            if depth > max_depth:
+                continue
+            nodes, seconds, nodes_per_second = run_perft(game, depth)
+            passed = nodes == expected_counts[depth]
+            all_passed = all_passed and passed
+            total_nodes += nodes
+            total_seconds += seconds
+            output.write("%-14s depth %d  %10d nodes  expected %10d  %10.0f nodes/s  %s\n"
+                         % (name, depth, nodes, expected_counts[depth], nodes_per_second, "ok" if passed else "FAIL"))
+
+    if total_seconds:
+        output.write("total %d nodes in %.2f s, %.0f nodes/s\n"
+                     % (total_nodes, total_seconds, total_nodes / total_seconds))
+    return all_passed
+
+
+if __name__ == "__main__":
+    if not check_perft(int(sys.argv[1]) if len(sys.argv) > 1 else 3):
+        sys.exit(1)
@@ -0,0 +1,112 @@
+import json
+import random
+import time
+
+
+# Number of timings kept for each name to work out the percentiles. Once there are more calls than this, a random
+# sample of them is kept
+MAX_SAMPLES = 10000
+
+
+class Profiler:
+    """
+    The class Profiler collects timings by name: how many times each one was recorded, the total time and a sample of
+    the individual times for the percentiles. A JanggiGame records into it while profiling is enabled, with a timing for
+    each phase of make_move and for each call of the methods it watches. The timings are read back with snapshot, as a
+    dictionary, or with to_json.
+    """
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        """
+        Initializes an empty profiler that keeps up to max_samples timings for each name
+        """
+        self._max_samples = max_samples
+        self._generator = random.Random(0)
+        self._calls = {}
+        self._totals = {}
+        self._maximums = {}
+        self._samples = {}
+        self._lap_start = None
+
+    def record(self, name, seconds):
+        """
+        Records a timing of seconds for the name
+        """
+        calls = self._calls.get(name, 0) + 1
+        self._calls[name] = calls
+        self._totals[name] = self._totals.get(name, 0.0) + seconds
+        if seconds > self._maximums.get(name, -1.0):
+            self._maximums[name] = seconds
+
+        # Keeps every timing until there are max_samples, then replaces them at random so the sample stays fair
+        samples = self._samples.setdefault(name, [])
+        if len(samples) < self._max_samples:
+            samples.append(seconds)
+        else:
+            index = self._generator.randrange(calls)
+            if index < self._max_samples:
+                samples[index] = seconds
+
+    def start_laps(self):
+        """
+        Starts timing a sequence of phases. Each call of lap records the time since the previous one
+        """
+        self._lap_start = time.perf_counter()
+
+    def lap(self, name):
+        """
+        Records the time since start_laps or the previous lap under the name
+        """
+        now = time.perf_counter()
+        self.record(name, now - self._lap_start)
+        self._lap_start = now
+
+    def wrap(self, name, method):
+        """
+        Returns a function that calls the method and records how long each call took under the name
+        """
+        record = self.record
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start)
+
+        return timed
+
+    def reset(self):
+        """
+        Forgets every timing recorded so far
+        """
+        self._calls.clear()
+        self._totals.clear()
+        self._maximums.clear()
+        self._samples.clear()
+
+    def snapshot(self):
+        """
+        Returns a dictionary with an entry for each name: the number of calls, the total time in seconds, and the mean,
+        median, 90th percentile, 99th percentile and longest time in microseconds. The percentiles come from the sample
+        of timings, but the longest time is the longest of every call, so a rare spike isn't lost from the sample
+        """
+        snapshot = {}
+        for name, calls in self._calls.items():
+            samples = sorted(self._samples[name])
+
+            def percentile(fraction):
+                return samples[int(fraction * (len(samples) - 1))] * 1e6
+
+            snapshot[name] = {"calls": calls, "total_seconds": self._totals[name],
+                              "mean_us": self._totals[name] / calls * 1e6, "p50_us": percentile(0.5),
+                              "p90_us": percentile(0.9), "p99_us": percentile(0.99),
+                              "max_us": self._maximums[name] * 1e6}
+        return snapshot
+
+    def to_json(self):
+        """
+        Returns the snapshot as JSON text
+        """
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
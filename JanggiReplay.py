@@ -0,0 +1,173 @@
+import gzip
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+
+from JanggiGame import JanggiGame
+
+
+# Number of illegal moves listed for each file. The rest are only counted
+MAX_ERRORS = 100
+
+
+################################ ARCHIVES ####################################
+# An archive is a text file, which can be gzip compressed, with one game per line. A game is the list of its moves in
+# make_move notation separated by spaces, each move being the square it is made from followed by the square it is made
+# to, such as "c7 c6 c4 c5 b8 e8". A pass is a move from a square to itself. Empty lines and lines starting with "#" are
+# skipped. Archives are read as bytes and each line is decoded on its own, so a line that isn't ASCII only spoils its
+# own game.
+
+def open_archive(path):
+    """
+    Opens an archive for reading as bytes, one line at a time. Files starting with the gzip header are decompressed
+    as they are read
+    """
+    with open(path, "rb") as archive:
+        compressed = archive.read(2) == b"\x1f\x8b"
+    if compressed:
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_records(path):
+    """
+    Reads the games of an archive one line at a time and yields each one as its line number and its list of squares.
+    A line that isn't ASCII is yielded with None for its squares. A truncated or corrupt gzip archive raises EOFError,
+    OSError or zlib.error when the bad part is reached
+    """
+    with open_archive(path) as archive:
+        for line_number, line in enumerate(archive, 1):
+            try:
+                squares = line.decode("ascii").split()
+            except UnicodeDecodeError:
+                yield line_number, None
+                continue
+            if squares and not squares[0].startswith("#"):
+                yield line_number, squares
+
+
+################################ REPLAY ######################################
+
+def replay_record(game, squares):
+    """
+    Replays the moves of a game record from the starting position with make_move, then takes them back with pop, so
+    the game is in the starting position again and can be used for the next record. Returns the number of moves made,
+    the game state after them, and the number of the first illegal move (counting from 1), or None if every move was
+    legal. A record with an odd number of squares ends with an illegal move
+    """
+    moves = 0
+    illegal_move = None
+    for index in range(0, len(squares), 2):
+        if index + 1 == len(squares) or not game.make_move(squares[index], squares[index + 1]):
+            illegal_move = moves + 1
+            break
+        moves += 1
+
+    game_state = game.get_game_state()
+    for _ in range(moves):
+        game.pop()
+    return moves, game_state, illegal_move
+
+
+def replay_file(path, max_errors=MAX_ERRORS):
+    """
+    Replays every game of an archive on a single game object, reading one line at a time, so memory doesn't depend on
+    the size of the archive. Returns a dictionary with the path, the number of games and moves, the number of games
+    with an illegal move, the first max_errors of them as (line number, move number, move) tuples, the number of games
+    in each final game state, the time taken in seconds, and a message if the archive is truncated or corrupt, or None.
+    A line that isn't ASCII counts as an illegal game, with None for its move number, and the games before a
+    truncated or corrupt part are still counted
+    """
+    game = JanggiGame()
+    summary = {"path": path, "games": 0, "moves": 0, "illegal": 0, "errors": [],
+               "states": {"UNFINISHED": 0, "BLUE_WON": 0, "RED_WON": 0}, "error": None}
+    start = time.perf_counter()
+
+    try:
+        for line_number, squares in read_records(path):
+            summary["games"] += 1
+            if squares is None:
+                summary["illegal"] += 1
+                if len(summary["errors"]) < max_errors:
+                    summary["errors"].append((line_number, None, "not ASCII"))
+                continue
+
+            moves, game_state, illegal_move = replay_record(game, squares)
+            summary["moves"] += moves
+            summary["states"][game_state] += 1
+            if illegal_move is not None:
+                summary["illegal"] += 1
+                if len(summary["errors"]) < max_errors:
+                    move = " ".join(squares[2 * illegal_move - 2:2 * illegal_move])
+                    summary["errors"].append((line_number, illegal_move, move))
+    except (EOFError, OSError, zlib.error) as error:
+        summary["error"] = "truncated or corrupt archive after %d games: %s" % (summary["games"], error)
+
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def replay_archives(paths, workers=None, max_errors=MAX_ERRORS):
+    """
+    Replays the archives across a pool of worker processes, one archive per worker at a time, and yields the summary
+    of each archive, as returned by replay_file, as soon as it is finished. workers defaults to the number of CPUs,
+    and with a single worker the archives are replayed in this process
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        for path in paths:
+            yield replay_file(path, max_errors)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for summary in pool.imap_unordered(_replay_task, [(path, max_errors) for path in paths]):
+            yield summary
+
+
+def _replay_task(task):
+    """
+    Replays the archive of a task in a worker process. The task is (path, max_errors)
+    """
+    return replay_file(*task)
+
+
+def run_replay(paths, workers=None, output=sys.stdout):
+    """
+    Replays the archives and writes a line for each archive with its games, moves, illegal games and final game
+    states, followed by its illegal moves and any problem reading it, and a line with the totals and the number of
+    moves per second. Returns True if every move of every archive was legal and every archive could be read
+    """
+    totals = {"games": 0, "moves": 0, "illegal": 0}
+    unreadable = 0
+    start = time.perf_counter()
+
+    for summary in replay_archives(paths, workers):
+        for key in totals:
+            totals[key] += summary[key]
+        output.write("%s: %d games, %d moves, %d illegal, %d unfinished, %d blue won, %d red won\n"
+                     % (summary["path"], summary["games"], summary["moves"], summary["illegal"],
+                        summary["states"]["UNFINISHED"], summary["states"]["BLUE_WON"],
+                        summary["states"]["RED_WON"]))
+        for line_number, move_number, move in summary["errors"]:
+            if move_number is None:
+                output.write("  line %d: %s\n" % (line_number, move))
+            else:
+                output.write("  line %d: move %d (%s) is illegal\n" % (line_number, move_number, move))
+        if summary["error"] is not None:
+            unreadable += 1
+            output.write("  %s\n" % summary["error"])
+
+    seconds = time.perf_counter() - start
+    output.write("total %d games, %d moves, %d illegal in %.2f s, %.0f moves/s\n"
+                 % (totals["games"], totals["moves"], totals["illegal"], seconds,
+                    totals["moves"] / seconds if seconds else 0.0))
+    return totals["illegal"] == 0 and unreadable == 0
+
+
+if __name__ == "__main__":
+    if not run_replay(sys.argv[1:]):
+        sys.exit(1)
@@ -0,0 +1,313 @@
+import asyncio
+import itertools
+import sys
+import time
+
+from JanggiGame import JanggiGame, move_names
+from JanggiSimulator import play_game, random_policy
+
+
+# Sessions that haven't been used for this many seconds are closed
+IDLE_TIMEOUT = 300
+
+# How often, in seconds, the server looks for idle sessions
+EVICTION_INTERVAL = 10
+
+
+class Session:
+    """
+    The class Session holds one game hosted by the server, with a lock so that only one command at a time works on the
+    game and the time it was last used
+    """
+
+    def __init__(self):
+        """
+        Initializes a new game, its lock and the time it was last used
+        """
+        self.game = JanggiGame()
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class JanggiServer:
+    """
+    The class JanggiServer hosts many games in one process with asyncio. Clients connect over TCP or a Unix socket and
+    send one command per line, and the server answers each command with one line:
+
+        NEW                        ->  OK <session>
+        MOVE <session> <from> <to> ->  OK <game state> <player to move> <player in check or ->, or ILLEGAL
+        STATE <session>            ->  OK <game state> <position in the notation of to_fen>
+        CLOSE <session>            ->  OK
+        QUIT                       ->  OK, and the connection is closed
+
+    Moves are in the make_move notation, such as "MOVE 1 c7 c6", and passing is a move from a square to itself. Any
+    connection can use any session, and each session has a lock so commands for the same game never interleave.
+    Sessions that haven't been used for idle_timeout seconds are closed. Problems with a command are answered with
+    ERROR and a message.
+    """
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, eviction_interval=EVICTION_INTERVAL):
+        """
+        Initializes the server with no sessions. It starts listening with start
+        """
+        self._idle_timeout = idle_timeout
+        self._eviction_interval = eviction_interval
+        self._sessions = {}
+        self._session_ids = itertools.count(1)
+        self._server = None
+        self._eviction_task = None
+        self._moves = 0
+
+    def get_session_count(self):
+        """
+        Returns the number of open sessions
+        """
+        return len(self._sessions)
+
+    def get_move_count(self):
+        """
+        Returns the number of MOVE commands the server has answered
+        """
+        return self._moves
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Starts listening on a TCP port of the host, or on the Unix socket at path if one is given, and starts looking
+        for idle sessions. A port of 0 picks a free port. Returns the address the server is listening on, as
+        (host, port) or the path
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_client, path)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host, port)
+        self._eviction_task = asyncio.ensure_future(self._evict_idle_sessions())
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        """
+        Serves clients until the server is closed
+        """
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening and stops looking for idle sessions. The sessions are closed
+        """
+        self._eviction_task.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+        self._sessions.clear()
+
+    ################################ COMMANDS ####################################
+
+    async def _handle_client(self, reader, writer):
+        """
+        Reads the commands of a connection one line at a time and writes the answer to each one, until the client
+        sends QUIT or closes the connection. Bad input is answered with an ERROR line and the connection stays open
+        """
+        try:
+            while True:
+                # A line longer than the stream's limit is thrown away, up to and including its newline, and
+                # answered with a single error. A last line without a newline is still read
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as error:
+                    line = error.partial
+                except asyncio.LimitOverrunError:
+                    await _skip_line(reader)
+                    writer.write(b"ERROR line too long\n")
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+
+                # Bytes that aren't ASCII are read and echoed back as question marks
+                words = line.decode("ascii", "replace").split()
+                answer = await self._answer(words)
+                writer.write(answer.encode("ascii", "replace") + b"\n")
+                await writer.drain()
+                if words and words[0].upper() == "QUIT":
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _answer(self, words):
+        """
+        Carries out the command in the list of words of a line and returns the answer line
+        """
+        if not words:
+            return "ERROR empty command"
+        command = words[0].upper()
+
+        if command == "NEW" and len(words) == 1:
+            session_id = str(next(self._session_ids))
+            self._sessions[session_id] = Session()
+            return "OK " + session_id
+
+        if command == "QUIT" and len(words) == 1:
+            return "OK"
+
+        if command not in ("MOVE", "STATE", "CLOSE") or len(words) != (4 if command == "MOVE" else 2):
+            return "ERROR unknown command " + " ".join(words)
+
+        session = self._sessions.get(words[1])
+        if session is None:
+            return "ERROR no session " + words[1]
+
+        async with session.lock:
+            session.last_used = time.monotonic()
+            game = session.game
+
+            if command == "CLOSE":
+                del self._sessions[words[1]]
+                return "OK"
+
+            if command == "STATE":
+                return "OK " + game.get_game_state() + " " + game.to_fen()
+
+            legal = game.make_move(words[2], words[3])
+            self._moves += 1
+            if not legal:
+                return "ILLEGAL"
+            return "OK %s %s %s" % (game.get_game_state(), game.get_player_turn(), game.get_in_check() or "-")
+
+    async def _evict_idle_sessions(self):
+        """
+        Closes the sessions that haven't been used for idle_timeout seconds, every eviction_interval seconds. Sessions
+        in the middle of a command are left alone
+        """
+        while True:
+            await asyncio.sleep(self._eviction_interval)
+            oldest = time.monotonic() - self._idle_timeout
+            for session_id, session in list(self._sessions.items()):
+                if session.last_used < oldest and not session.lock.locked():
+                    del self._sessions[session_id]
+
+
+async def _skip_line(reader):
+    """
+    Reads and throws away the rest of the current line, up to and including its newline, however long it is, a piece
+    at a time so it is never held in memory at once
+    """
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.LimitOverrunError as error:
+            await reader.readexactly(error.consumed)
+        except asyncio.IncompleteReadError:
+            return
+
+
+################################ LOAD GENERATOR ##############################
+# The load generator opens a number of connections to a server and plays random games on each of them, one command at
+# a time, timing every MOVE from sending the command to reading the answer. The games are played out with
+# JanggiSimulator before the clients start, so the time the clients spend choosing moves isn't measured.
+
+def _game_commands(moves):
+    """
+    Takes the list of moves of a game, encoded the same way as legal_moves, and returns them as (from, to) pairs of
+    squares in make_move notation. A pass becomes a move from the general's square to itself
+    """
+    game = JanggiGame()
+    commands = []
+    for move in moves:
+        commands.append(move_names(game, move))
+        game.push(move)
+    return commands
+
+
+def _client_games(client, moves, max_game_moves, seed):
+    """
+    Plays random games for a client until they add up to moves moves, and returns the list of the games' commands
+    """
+    games = []
+    while moves > 0:
+        result = play_game(client * 1000 + len(games), random_policy, seed, min(moves, max_game_moves))
+        games.append(_game_commands(result["moves"]))
+        moves -= result["length"]
+    return games
+
+
+async def _run_client(address, games, latencies):
+    """
+    Connects to the server and plays each of the games in a new session, one MOVE command at a time. Appends the
+    latency of each MOVE, in seconds, to latencies
+    """
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+
+    async def send(line):
+        writer.write(line.encode("ascii") + b"\n")
+        await writer.drain()
+        return (await reader.readline()).decode("ascii").split()
+
+    for commands in games:
+        session_id = (await send("NEW"))[1]
+        for from_square, to_square in commands:
+            start = time.perf_counter()
+            answer = await send("MOVE %s %s %s" % (session_id, from_square, to_square))
+            latencies.append(time.perf_counter() - start)
+            if answer[0] != "OK":
+                raise RuntimeError("the server didn't accept a legal move: " + " ".join(answer))
+        await send("CLOSE " + session_id)
+
+    await send("QUIT")
+    writer.close()
+
+
+async def run_load_test(address, clients=50, moves_per_client=200, max_game_moves=150, seed=0):
+    """
+    Runs clients connections to the server at address, a (host, port) pair or the path of a Unix socket, each playing
+    random games of up to max_game_moves moves until it has made moves_per_client moves, all at the same time. Returns
+    a dictionary with the number of moves, the time taken in seconds, the number of moves per second and the median and
+    99th percentile latency of a move in milliseconds
+    """
+    games = [_client_games(client, moves_per_client, max_game_moves, seed) for client in range(clients)]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[_run_client(address, client_games, latencies) for client_games in games])
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {"moves": len(latencies), "seconds": seconds, "moves_per_second": len(latencies) / seconds,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000}
+
+
+async def _serve(port):
+    """
+    Runs a server on the port of localhost until it is interrupted
+    """
+    server = JanggiServer()
+    print("listening on %s:%d" % (await server.start(port=port))[:2])
+    await server.serve_forever()
+
+
+async def _measure(clients, moves_per_client):
+    """
+    Starts a server on a free port of localhost, runs the load test against it in the same process and closes it
+    """
+    server = JanggiServer()
+    address = await server.start()
+    try:
+        return await run_load_test(address[:2], clients, moves_per_client)
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        asyncio.run(_serve(int(sys.argv[2]) if len(sys.argv) > 2 else 7000))
+    else:
+        if len(sys.argv) > 1 and sys.argv[1] == "load":
+            result = asyncio.run(run_load_test(("127.0.0.1", int(sys.argv[2]) if len(sys.argv) > 2 else 7000),
+                                               int(sys.argv[3]) if len(sys.argv) > 3 else 50))
+        else:
+            result = asyncio.run(_measure(int(sys.argv[1]) if len(sys.argv) > 1 else 50, 200))
+        print("%(moves)d moves in %(seconds).2f s, %(moves_per_second).0f moves/s, p50 %(p50_ms).2f ms, "
+              "p99 %(p99_ms).2f ms" % result)
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+
+from JanggiEngine import PIECE_VALUES
+from JanggiGame import JanggiGame, PASS_MOVE
+
+
+# Games that haven't been won after this many moves, passes included, are stopped and counted as unfinished
+MAX_MOVES = 300
+
+
+################################ POLICIES ####################################
+# A policy chooses the next move of a game. It is called with the game, the list of legal moves for the player to move
+# and the game's random generator, and returns one of the moves. Policies have to be defined at the top level of a
+# module so the worker processes can receive them.
+
+def random_policy(game, moves, generator):
+    """
+    Chooses one of the legal moves at random, passing included
+    """
+    return generator.choice(moves)
+
+
+def capture_policy(game, moves, generator):
+    """
+    Captures the most valuable piece it can, choosing at random between equal captures, and otherwise plays a random
+    move that isn't a pass. It only passes when it has no other move
+    """
+    best_value = 0
+    best_moves = []
+    other_moves = []
+    for move in moves:
+        if move == PASS_MOVE:
+            continue
+        captured_piece = game.get_piece_at(move % 90)
+        value = 0 if captured_piece is None else PIECE_VALUES[captured_piece[1][:2]]
+        if value > best_value:
+            best_value, best_moves = value, [move]
+        elif value and value == best_value:
+            best_moves.append(move)
+        elif not value:
+            other_moves.append(move)
+
+    return generator.choice(best_moves or other_moves or moves)
+
+
+POLICIES = {"random": random_policy, "capture": capture_policy}
+
+
+################################ SIMULATION ##################################
+
+def play_game(index, policy, seed=0, max_moves=MAX_MOVES):
+    """
+    Plays one game from the starting position, choosing every move with the policy, until it is won or max_moves moves
+    have been made. The game's random generator is seeded from the seed and the game's index, so a game can be played
+    again. Returns a dictionary with the index, the winner ("blue", "red", or None if the game wasn't finished), the
+    number of moves and the list of moves, encoded the same way as the game's legal_moves
+    """
+    game = JanggiGame()
+    generator = random.Random("%d-%d" % (seed, index))
+    moves = []
+
+    while len(moves) < max_moves and game.get_game_state() == "UNFINISHED":
+        move = policy(game, list(game.legal_moves()), generator)
+        game.push(move)
+        moves.append(move)
+
+    winner = {"BLUE_WON": "blue", "RED_WON": "red"}.get(game.get_game_state())
+    return {"index": index, "winner": winner, "length": len(moves), "moves": moves}
+
+
+def simulate(n_games, policy=random_policy, workers=None, seed=0, max_moves=MAX_MOVES):
+    """
+    Plays n_games games with the policy across a pool of worker processes and yields the result of each game, as
+    returned by play_game, as soon as it is finished. The results come back in the order the games finish, not in the
+    order of their index. The policy can be a function or the name of one of the POLICIES. workers defaults to the
+    number of CPUs, and with a single worker the games are played in this process. Only a few games per worker are
+    handed out ahead of the results being read, so memory stays the same however many games are played
+    """
+    if isinstance(policy, str):
+        policy = POLICIES[policy]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        for index in range(n_games):
+            yield play_game(index, policy, seed, max_moves)
+        return
+
+    # The pool reads tasks on its own thread as fast as it can, so the tasks wait on a semaphore that is released as
+    # each result is read. If the results stop being read, the thread is woken up to finish
+    in_flight = threading.Semaphore(workers * 4)
+    stopped = threading.Event()
+
+    def tasks():
+        for index in range(n_games):
+            in_flight.acquire()
+            if stopped.is_set():
+                return
+            yield index, policy, seed, max_moves
+
+    with multiprocessing.Pool(workers) as pool:
+        try:
+            for result in pool.imap_unordered(_play_task, tasks()):
+                in_flight.release()
+                yield result
+        finally:
+            stopped.set()
+            in_flight.release()
+
+
+def _play_task(task):
+    """
+    Plays the game of a task in a worker process. The task is (index, policy, seed, max_moves)
+    """
+    return play_game(*task)
+
+
+def run_simulation(n_games, policy=random_policy, workers=None, seed=0, max_moves=MAX_MOVES, output=sys.stdout,
+                   report_every=100):
+    """
+    Plays n_games games with simulate and writes a progress line with the number of games per second after every
+    report_every games. Only running totals are kept, not the games. Returns a dictionary with the number of games,
+    the wins of each player, the games that weren't finished, the total number of moves, the time taken in seconds and
+    the number of games per second
+    """
+    totals = {"games": 0, "blue": 0, "red": 0, "unfinished": 0, "moves": 0}
+    start = time.perf_counter()
+
+    for result in simulate(n_games, policy, workers, seed, max_moves):
+        totals["games"] += 1
+        totals[result["winner"] or "unfinished"] += 1
+        totals["moves"] += result["length"]
+        if report_every and totals["games"] % report_every == 0:
+            seconds = time.perf_counter() - start
+            output.write("%d games, %.1f games/s\n" % (totals["games"], totals["games"] / seconds if seconds else 0.0))
+
+    seconds = time.perf_counter() - start
+    totals["seconds"] = seconds
+    totals["games_per_second"] = totals["games"] / seconds if seconds else 0.0
+    return totals
+
+
+if __name__ == "__main__":
+    summary = run_simulation(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+                             sys.argv[2] if len(sys.argv) > 2 else "random",
+                             int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    print("%(games)d games in %(seconds).2f s, %(games_per_second).1f games/s: blue won %(blue)d, red won %(red)d, "
+          "%(unfinished)d unfinished, %(moves)d moves" % summary)
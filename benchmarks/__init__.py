@@ -0,0 +1,8 @@
+from benchmarks.macro import macro_benchmarks
+from benchmarks.micro import micro_benchmarks
+from benchmarks.run import (THRESHOLD, compare_results, load_results, run_benchmarks, save_results,
+                            write_comparison)
+from benchmarks.timing import time_operation
+
+__all__ = ["THRESHOLD", "compare_results", "load_results", "macro_benchmarks", "micro_benchmarks", "run_benchmarks",
+           "save_results", "time_operation", "write_comparison"]
@@ -0,0 +1,24 @@
+import sys
+
+from benchmarks.run import THRESHOLD, compare_results, load_results, run_benchmarks, save_results, write_comparison
+
+
+# python -m benchmarks [micro|macro|all] [results.json] [baseline.json] [threshold]
+#
+# Runs the suite, writes the results to results.json if it is given, and compares them with the results in
+# baseline.json if it is given. Exits with status 1 if a benchmark got slower than the baseline by more than the
+# threshold, a fraction of the baseline's time that defaults to THRESHOLD.
+if __name__ == "__main__":
+    suite = sys.argv[1] if len(sys.argv) > 1 else "all"
+    results = run_benchmarks(("micro", "macro") if suite == "all" else (suite,))
+
+    if len(sys.argv) > 2:
+        save_results(results, sys.argv[2])
+
+    if len(sys.argv) > 3:
+        comparison, regressions = compare_results(results, load_results(sys.argv[3]),
+                                                  float(sys.argv[4]) if len(sys.argv) > 4 else THRESHOLD)
+        write_comparison(comparison, regressions)
+        if regressions:
+            print("%d of %d benchmarks regressed" % (len(regressions), len(comparison)))
+            sys.exit(1)
@@ -0,0 +1,52 @@
+from JanggiGame import JanggiGame, move_names
+from JanggiPerft import PERFT_POSITIONS
+from JanggiSimulator import MAX_MOVES, capture_policy, play_game, random_policy
+
+
+# Number of games each of the play benchmarks plays. The games are seeded, so they are the same in every run
+GAMES = 4
+
+
+def _scripted_game(index, policy, seed=0, max_moves=MAX_MOVES):
+    """
+    Plays a seeded game with the policy and returns its moves in make_move notation, as (from, to) pairs of squares. A
+    pass becomes a move from the general's square to itself
+    """
+    game = JanggiGame()
+    script = []
+    for move in play_game(index, policy, seed, max_moves)["moves"]:
+        script.append(move_names(game, move))
+        game.push(move)
+    return script
+
+
+def _replay(scripts):
+    """
+    Returns a function that plays each script with make_move on a new game
+    """
+    def replay():
+        for script in scripts:
+            game = JanggiGame()
+            for from_square, to_square in script:
+                game.make_move(from_square, to_square)
+
+    return replay
+
+
+def macro_benchmarks():
+    """
+    Returns the macro benchmarks as a list of (name, operation) pairs, where the operation is a function without
+    arguments that plays its games once. The scripts are worked out here, so only playing them is timed
+    """
+    reference_scripts = [moves for _, moves, _ in PERFT_POSITIONS if moves]
+    random_scripts = [_scripted_game(index, random_policy) for index in range(GAMES)]
+
+    return [
+        # The move lists of the perft reference positions and full length seeded random games, played with make_move
+        ("scripted_reference_games", _replay(reference_scripts)),
+        ("scripted_random_games", _replay(random_scripts)),
+
+        # Seeded games played with push, choosing every move from legal_moves, the same as JanggiSimulator
+        ("random_play_games", lambda: [play_game(index, random_policy) for index in range(GAMES)]),
+        ("capture_play_games", lambda: [play_game(index, capture_policy) for index in range(GAMES)]),
+    ]
@@ -0,0 +1,86 @@
+from JanggiGame import JanggiGame, PASS_MOVE
+from JanggiPerft import PERFT_POSITIONS, position_from_moves
+
+
+################################ POSITIONS ###################################
+# The micro benchmarks run on the reference positions of JanggiPerft, so they time the same positions in every run.
+
+def _position(name):
+    """
+    Returns a new game in the reference position with the name
+    """
+    for position_name, moves, _ in PERFT_POSITIONS:
+        if position_name == name:
+            return position_from_moves(moves)
+    raise KeyError(name)
+
+
+def _validator_cases(game):
+    """
+    Returns a dictionary with the first legal move of each type of piece in the game's position, as the piece's valid
+    moves method, its from and to coordinates and the player to move
+    """
+    validators = {"CH": game.chariot_valid_moves, "EL": game.elephant_valid_moves, "HR": game.horse_valid_moves,
+                  "GD": game.guard_valid_moves, "GN": game.general_valid_moves, "CA": game.cannon_valid_moves,
+                  "SD": game.soldier_valid_moves}
+    cases = {}
+    for move in game.legal_moves():
+        if move == PASS_MOVE:
+            continue
+        from_square, to_square = divmod(move, 90)
+        piece = game.get_piece_at(from_square)[1][:2]
+        if piece not in cases:
+            cases[piece] = (validators[piece], [from_square % 9, from_square // 9], [to_square % 9, to_square // 9],
+                            game.get_player_turn())
+    return cases
+
+
+################################ BENCHMARKS ##################################
+
+def micro_benchmarks():
+    """
+    Returns the micro benchmarks as a list of (name, operation) pairs, where the operation is a function without
+    arguments that runs the code being timed once. The games they use are set up here, so setting up isn't timed
+    """
+    benchmarks = []
+
+    # A legal move of the starting position, taken back with pop so every call starts from the same position
+    start = JanggiGame()
+
+    def make_move():
+        start.make_move("c7", "c6")
+        start.pop()
+
+    benchmarks.append(("make_move", make_move))
+
+    # A move that is turned down by the piece's valid moves method, which leaves the game as it was
+    benchmarks.append(("make_move_invalid", lambda: start.make_move("c10", "c8")))
+
+    # A player who isn't in check, and a player who is, which also looks for checkmate. The game caches whether a
+    # position has a legal move, so the cache is emptied each time to time the search for one
+    benchmarks.append(("is_in_check", lambda: start.is_in_check("blue")))
+    in_check = _position("red in check")
+
+    def is_in_check_checked():
+        in_check.clear_legal_move_cache()
+        in_check.is_in_check("red")
+
+    benchmarks.append(("is_in_check_checked", is_in_check_checked))
+
+    # Every move of every piece of a player, in a position with open lines for the chariots and cannons
+    open_files = _position("open files")
+    benchmarks.append(("enemy_legal_moves", lambda: open_files.enemy_legal_moves("blue", [])))
+
+    for piece, case in sorted(_validator_cases(open_files).items()):
+        validator, from_coordinates, to_coordinates, player = case
+        if piece == "SD":
+            benchmarks.append(("valid_moves_" + piece,
+                               lambda validator=validator, from_coordinates=from_coordinates,
+                               to_coordinates=to_coordinates, player=player:
+                               validator(from_coordinates, to_coordinates, player)))
+        else:
+            benchmarks.append(("valid_moves_" + piece,
+                               lambda validator=validator, from_coordinates=from_coordinates,
+                               to_coordinates=to_coordinates: validator(from_coordinates, to_coordinates)))
+
+    return benchmarks
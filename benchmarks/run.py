@@ -0,0 +1,84 @@
+import json
+import platform
+import sys
+import time
+
+from benchmarks.macro import macro_benchmarks
+from benchmarks.micro import micro_benchmarks
+from benchmarks.timing import time_operation
+
+
+# A benchmark that is this much slower than the baseline, as a fraction of the baseline's time, is a regression
+THRESHOLD = 0.10
+
+SUITES = {"micro": micro_benchmarks, "macro": macro_benchmarks}
+
+
+################################ RUNNING #####################################
+
+def run_benchmarks(suites=("micro", "macro"), output=sys.stdout):
+    """
+    Runs the benchmarks of each of the suites, "micro" and "macro", and writes a line with the time of each one as it
+    finishes. Returns the results as a dictionary with the Python version, the machine, the time they were run and the
+    timing of each benchmark, as returned by time_operation, by name. The names start with the suite, such as
+    "micro.make_move"
+    """
+    results = {"python": platform.python_version(), "implementation": platform.python_implementation(),
+               "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "benchmarks": {}}
+
+    for suite in suites:
+        for name, operation in SUITES[suite]():
+            timing = time_operation(operation)
+            results["benchmarks"][suite + "." + name] = timing
+            output.write("%-36s %12.2f us %14.1f /s\n" % (suite + "." + name, timing["seconds"] * 1e6,
+                                                          timing["per_second"]))
+    return results
+
+
+def save_results(results, path):
+    """
+    Writes the results to a JSON file
+    """
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+        results_file.write("\n")
+
+
+def load_results(path):
+    """
+    Reads results written by save_results
+    """
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+################################ COMPARING ###################################
+
+def compare_results(results, baseline, threshold=THRESHOLD):
+    """
+    Compares the results with the baseline results and returns a list with a (name, baseline seconds, seconds, change)
+    tuple for each benchmark in both, where the change is the difference in time as a fraction of the baseline's time,
+    positive when it got slower, and a list of the names of the benchmarks that got slower by more than the threshold
+    """
+    comparison = []
+    regressions = []
+    for name, timing in sorted(results["benchmarks"].items()):
+        if name not in baseline["benchmarks"]:
+            continue
+        baseline_seconds = baseline["benchmarks"][name]["seconds"]
+        change = timing["seconds"] / baseline_seconds - 1.0 if baseline_seconds else 0.0
+        comparison.append((name, baseline_seconds, timing["seconds"], change))
+        if change > threshold:
+            regressions.append(name)
+    return comparison, regressions
+
+
+def write_comparison(comparison, regressions, output=sys.stdout):
+    """
+    Writes a line for each benchmark of a comparison with the baseline time, the new time and the change, marking the
+    regressions
+    """
+    for name, baseline_seconds, seconds, change in comparison:
+        output.write("%-36s %12.2f us -> %12.2f us %+7.1f%%%s\n" % (name, baseline_seconds * 1e6, seconds * 1e6,
+                                                                    change * 100,
+                                                                    "  REGRESSION" if name in regressions else ""))
@@ -0,0 +1,26 @@
+import timeit
+
+
+# Number of times each benchmark is timed. The fastest run is kept, since the slower ones are slowed down by the rest of
+# the machine rather than by the code
+REPEAT = 5
+
+# Each run of a benchmark lasts at least this many seconds, repeating the operation as many times as that takes
+MIN_RUN_SECONDS = 0.2
+
+
+def time_operation(operation, repeat=REPEAT, min_run_seconds=MIN_RUN_SECONDS):
+    """
+    Times an operation, a function without arguments, and returns a dictionary with the fastest time of one call in
+    seconds, the median time of one call over the runs, the number of calls per second at the fastest time and the
+    number of calls in each run. Each of the repeat runs calls the operation enough times to last min_run_seconds
+    """
+    timer = timeit.Timer(operation)
+    number = 1
+    while timer.timeit(number) < min_run_seconds:
+        number *= 2
+
+    times = sorted(timer.repeat(repeat, number))
+    seconds = times[0] / number
+    return {"seconds": seconds, "median_seconds": times[len(times) // 2] / number,
+            "per_second": 1.0 / seconds if seconds else 0.0, "number": number}